@@ -4,7 +4,7 @@ from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-from database import SessionLocal
+from database import get_db
 from schemas.asset import (
     AssetCashFlowResponse,
     AssetDetailResponse,
@@ -30,14 +30,6 @@ router = APIRouter(
 )
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/detail", response_model=AssetDetailResponse)
 async def get_asset_detail(
     target_date: Annotated[Optional[date], Query(description="目标日期，格式 YYYY-MM-DD")] = None,
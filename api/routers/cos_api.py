@@ -1,8 +1,9 @@
 # routers/cos_api.py
 
+import asyncio
 import os
 from fastapi import APIRouter, HTTPException, status, Query
-from config import logger  # 从您的全局配置导入 logger
+from config import get_cos_max_concurrent_uploads, logger  # 从您的全局配置导入 logger
 from services.tencent_cloud_cos import TencentCosService
 from models.cos import CosUploadRequest, CosUploadResponse, CosUrlResponse
 
@@ -21,6 +22,9 @@ except Exception as e:
     cos_service = None
     logger.error(f"Critical: Failed to initialize TencentCosService at startup: {e}")
 
+# 限制同时进行的上传数量，避免大量并发请求挤占 COS SDK 线程池和磁盘 I/O
+_upload_semaphore = asyncio.Semaphore(get_cos_max_concurrent_uploads())
+
 
 def get_cos_service() -> TencentCosService:
     """
@@ -56,11 +60,12 @@ async def upload_file_to_cos(payload: CosUploadRequest):
         )
 
     try:
-        # 调用服务进行上传
-        success = service.upload_file(
-            local_file_path=payload.local_file_path,
-            key=payload.cos_key
-        )
+        # 调用服务进行上传：在线程池中执行阻塞上传，并由信号量限制并发
+        async with _upload_semaphore:
+            success = await service.upload_file_async(
+                local_file_path=payload.local_file_path,
+                key=payload.cos_key
+            )
 
         if success:
             # 如果未指定key，服务会使用文件名，我们需要获取它
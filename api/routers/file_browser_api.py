@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import HTMLResponse
+import asyncio
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, TypeAdapter
+from typing import AsyncIterator, Iterator, List, Optional
 import os
 from datetime import datetime
+from itertools import islice
+import orjson
 from config import VIDEO_DIRECTORY
+from utils import resolve_within_directory
 
 router = APIRouter()
 
@@ -20,31 +25,133 @@ class FileInfo(BaseModel):
     size: int
 
 
+# 模块级复用校验/序列化器，直接由 pydantic-core 输出 JSON 字节
+_FILE_LIST_ADAPTER = TypeAdapter(List[FileInfo])
+
+STREAM_BATCH_SIZE = 1000
+LIST_CACHE_CONTROL = "private, no-cache"
+
+
+def _resolve_directory(path: Optional[str]) -> str:
+    # 先做纯字符串的越界检查，拒绝 .. 等逃出视频目录的请求，不触发任何文件系统访问
+    base_path = resolve_within_directory(VIDEO_DIRECTORY, path)
+    if base_path is None:
+        raise HTTPException(status_code=403, detail="Path is outside the video directory")
+
+    if not os.path.isdir(base_path):
+        raise HTTPException(status_code=404, detail="Directory not found")
+    return base_path
+
+
+def _build_path_prefix(base_path: str) -> str:
+    # 目录相对路径只计算一次，条目路径直接拼接文件名
+    relative_base = os.path.relpath(base_path, os.path.abspath(VIDEO_DIRECTORY))
+    return "" if relative_base == os.curdir else relative_base + os.sep
+
+
+def _build_file_record(entry: os.DirEntry, path_prefix: str) -> dict:
+    stat = entry.stat()
+    return {
+        "name": entry.name,
+        "path": path_prefix + entry.name,
+        "is_directory": entry.is_dir(),
+        "last_modified": datetime.fromtimestamp(stat.st_mtime),
+        "size": stat.st_size,
+    }
+
+
+def _scan_directory(base_path: str, path_prefix: str) -> tuple[list[dict], float]:
+    """扫描目录条目，同时返回目录自身的 mtime（都是阻塞的文件系统调用，一起放在线程中执行）。"""
+    directory_mtime = os.stat(base_path).st_mtime
+    with os.scandir(base_path) as entries:
+        return [_build_file_record(entry, path_prefix) for entry in entries], directory_mtime
+
+
+def _build_listing_validators(directory_mtime: float, records: list[dict]) -> tuple[str, float]:
+    """根据目录及条目的修改时间、数量和大小生成弱 ETag 与 Last-Modified 时间戳。"""
+    latest_mtime = directory_mtime
+    total_size = 0
+    for record in records:
+        latest_mtime = max(latest_mtime, record["last_modified"].timestamp())
+        total_size += record["size"]
+    etag = f'W/"{len(records)}-{int(latest_mtime * 1_000_000)}-{total_size}"'
+    return etag, latest_mtime
+
+
+def _is_not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # "*" 匹配任意已存在的表示，目录列表总是存在
+        if if_none_match.strip() == "*":
+            return True
+        return etag in (tag.strip() for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # HTTP 日期只精确到秒
+    return int(last_modified) <= since
+
+
+def _read_record_batch(entries: Iterator[os.DirEntry], path_prefix: str) -> list[dict]:
+    return [_build_file_record(entry, path_prefix) for entry in islice(entries, STREAM_BATCH_SIZE)]
+
+
+async def _iter_ndjson_records(base_path: str, path_prefix: str) -> AsyncIterator[bytes]:
+    entries = os.scandir(base_path)
+    try:
+        while True:
+            # 分批在线程中读取目录，避免慢速文件系统阻塞事件循环
+            batch = await asyncio.to_thread(_read_record_batch, entries, path_prefix)
+            if not batch:
+                break
+            yield b"".join(orjson.dumps(record) + b"\n" for record in batch)
+    finally:
+        entries.close()
+
+
 @router.get("/files/", response_model=List[FileInfo])
-async def list_files(path: Optional[str] = None):
+async def list_files(request: Request, path: Optional[str] = None):
     """
     List files and directories.
     """
-    if path is None:
-        base_path = VIDEO_DIRECTORY
-    else:
-        base_path = os.path.join(VIDEO_DIRECTORY, path)
-
-    if not os.path.exists(base_path) or not os.path.isdir(base_path):
-        raise HTTPException(status_code=404, detail="Directory not found")
-
-    files_info = []
-    for entry in os.scandir(base_path):
-        full_path = os.path.join(base_path, entry.name)
-        stat = entry.stat()
-        files_info.append(FileInfo(
-            name=entry.name,
-            path=os.path.relpath(full_path, VIDEO_DIRECTORY),
-            is_directory=entry.is_dir(),
-            last_modified=datetime.fromtimestamp(stat.st_mtime),
-            size=stat.st_size
-        ))
-    return files_info
+    base_path = _resolve_directory(path)
+    path_prefix = _build_path_prefix(base_path)
+
+    # 目录扫描放到线程中执行，避免阻塞事件循环
+    records, directory_mtime = await asyncio.to_thread(_scan_directory, base_path, path_prefix)
+
+    # 录制中的文件大小会持续变化，因此校验值基于扫描结果而不是仅看目录 mtime；
+    # 每次请求仍需完整扫描目录，内容未变化时返回 304 只省去序列化和传输
+    etag, last_modified = _build_listing_validators(directory_mtime, records)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Cache-Control": LIST_CACHE_CONTROL,
+    }
+    if _is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    # response_model 仅用于文档；校验和序列化一次性交给共享的 TypeAdapter 完成
+    content = _FILE_LIST_ADAPTER.dump_json(_FILE_LIST_ADAPTER.validate_python(records))
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+@router.get("/files/stream")
+async def stream_files(path: Optional[str] = None):
+    """
+    以 NDJSON 流式返回目录内容，每行一个文件条目，适用于超大目录。
+    """
+    base_path = _resolve_directory(path)
+    path_prefix = _build_path_prefix(base_path)
+    return StreamingResponse(
+        _iter_ndjson_records(base_path, path_prefix),
+        media_type="application/x-ndjson",
+    )
 
 
 @router.get("/browser/", response_class=HTMLResponse)
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from datetime import date
 from typing import Annotated, Optional
 
@@ -5,7 +7,7 @@ from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile,
 from sqlalchemy.orm import Session
 
 from crud.settlement_crud import list_settlements
-from database import SessionLocal
+from database import get_db
 from schemas.settlement import SettlementImportResponse, SettlementListResponse
 from services.settlement_import_service import (
     SettlementImportError,
@@ -17,13 +19,7 @@ router = APIRouter(
     tags=["Settlement Records"],
 )
 
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 
 @router.post("/import", response_model=SettlementImportResponse)
@@ -38,11 +34,17 @@ async def import_settlement_csv(
             detail="仅支持导入 .csv 文件",
         )
 
+    # 分块落盘，避免大文件整体读入内存
+    temp_path: Optional[str] = None
     try:
-        file_content = await file.read()
-        return settlement_import_service.import_csv(
+        with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as temp_file:
+            temp_path = temp_file.name
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                temp_file.write(chunk)
+
+        return settlement_import_service.import_csv_file(
             db=db,
-            file_bytes=file_content,
+            file_path=temp_path,
             filename=filename,
         )
     except SettlementImportError as exc:
@@ -50,6 +52,9 @@ async def import_settlement_csv(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(exc),
         ) from exc
+    finally:
+        if temp_path is not None:
+            os.remove(temp_path)
 
 
 @router.get("", response_model=SettlementListResponse)
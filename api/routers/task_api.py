@@ -1,55 +1,79 @@
 # routers/task_api.py
+import asyncio
 import os
+import stat
 import uuid
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
 from config import logger, VIDEO_DIRECTORY
-from crud.task_crud import create_task, get_task, get_tasks_by_batch_id, list_tasks
-from database import SessionLocal
+from crud.task_crud import (
+    bulk_create_tasks,
+    create_task,
+    get_batch_progress,
+    get_batch_results_ordered,
+    get_task,
+    list_tasks,
+)
+from database import get_db
 from models.task import BatchTranscriptionResults, TaskStatus
 from schemas.task import TaskCreate, Task, MultiFileTaskCreate
 from services import transcription_service, ffmpeg_service
+from services.job_queue import transcription_job_queue
+from utils import resolve_within_directory
 
 router = APIRouter(
     prefix="/tasks",
     tags=["Transcription Tasks"]
 )
 
-AUDIO_EXTENSIONS = {".aac", ".mp3", ".flac", ".wav", ".m4a", ".ogg"}
-VIDEO_EXTENSIONS = {".mp4", ".flv", ".mkv", ".avi", ".mov", ".m4v", ".ts"}
+AUDIO_EXTENSIONS = frozenset({".aac", ".mp3", ".flac", ".wav", ".m4a", ".ogg"})
+VIDEO_EXTENSIONS = frozenset({".mp4", ".flv", ".mkv", ".avi", ".mov", ".m4v", ".ts"})
+
+# 模块级复用任务列表的校验/序列化器，直接由 pydantic-core 输出 JSON 字节
+_TASK_LIST_ADAPTER = TypeAdapter(List[Task])
+
+
+def _use_audio_as_is(source_path: str) -> str:
+    return source_path
+
 
+def _extract_audio_from_video(source_path: str) -> str:
+    extracted = ffmpeg_service.extract_aac_audio(source_path)
+    if not extracted:
+        raise RuntimeError(f"Failed to extract audio from video: {source_path}")
+    return extracted
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+# 扩展名 -> 处理函数，一次字典查找即可决定直接使用音频还是先从视频中提取音频
+_AUDIO_PATH_RESOLVERS = {
+    **{extension: _use_audio_as_is for extension in AUDIO_EXTENSIONS},
+    **{extension: _extract_audio_from_video for extension in VIDEO_EXTENSIONS},
+}
 
 
 def _resolve_audio_path(source_path: str) -> str:
     """根据扩展名决定直接使用音频或先从视频中提取音频。"""
 
-    extension = os.path.splitext(source_path)[1].lower()
-    if extension in AUDIO_EXTENSIONS:
-        return source_path
-    if extension in VIDEO_EXTENSIONS:
-        extracted = ffmpeg_service.extract_aac_audio(source_path)
-        if not extracted:
-            raise RuntimeError(f"Failed to extract audio from video: {source_path}")
-        return extracted
+    resolver = _AUDIO_PATH_RESOLVERS.get(os.path.splitext(source_path)[1].lower())
+    if resolver is None:
+        raise RuntimeError(f"Unsupported file type for transcription: {source_path}")
+    return resolver(source_path)
+
+
+async def _resolve_audio_path_bounded(source_path: str, semaphore: asyncio.Semaphore) -> str:
+    """在线程中解析音频路径，并通过信号量限制同时运行的 ffmpeg 进程数。"""
 
-    raise RuntimeError(f"Unsupported file type for transcription: {source_path}")
+    async with semaphore:
+        return await asyncio.to_thread(_resolve_audio_path, source_path)
 
 
 @router.post("/audio-transcription", status_code=status.HTTP_202_ACCEPTED, response_model=Task)
 async def create_transcription_task(
         task_request: TaskCreate,
-        background_tasks: BackgroundTasks,
         db: Session = Depends(get_db)
 ):
     """
@@ -59,28 +83,32 @@ async def create_transcription_task(
     - **local_audio_path**: 服务器上音频文件的绝对路径。
     - **engine_model_type**: ASR 引擎类型，例如 '16k_zh'。
     """
-    logger.info(f"Received transcription request for: {task_request.local_audio_path}")
+    logger.info("Received transcription request for: %s", task_request.local_audio_path)
 
     if not os.path.isabs(task_request.local_audio_path):
-        logger.warning(f"Received relative path: {task_request.local_audio_path}. Converting to absolute path.")
+        logger.warning("Received relative path: %s. Converting to absolute path.", task_request.local_audio_path)
         # 如果接收到的是相对路径，则会基于预设的 `VIDEO_DIRECTORY` 将其转换为绝对路径。
         # 注意：`VIDEO_DIRECTORY` 必须在 `config.py` 中正确配置。
-        task_request.local_audio_path = os.path.join(VIDEO_DIRECTORY, task_request.local_audio_path)
-        logger.info(f"Converted to absolute path: {task_request.local_audio_path}")
+        absolute_path = resolve_within_directory(VIDEO_DIRECTORY, task_request.local_audio_path)
+        if absolute_path is None:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                                detail="Path is outside the video directory")
+        task_request.local_audio_path = absolute_path
+        logger.info("Converted to absolute path: %s", task_request.local_audio_path)
 
     # 1. 在数据库中创建任务记录
     db_task = create_task(db=db, task_data=task_request)
 
-    # 2. 将耗时任务添加到后台执行
+    # 2. 将耗时任务提交到后台任务队列执行
     asr_params = {
         "engine_model_type": task_request.engine_model_type,
         "channel_num": task_request.channel_num,
         "res_text_format": task_request.res_text_format,
         "hotword_id": task_request.hotword_id
     }
-    background_tasks.add_task(transcription_service.run_transcription_pipeline, db, db_task.id, asr_params)
+    transcription_job_queue.enqueue(transcription_service.run_transcription_pipeline, db_task.id, asr_params)
 
-    logger.info(f"Task {db_task.id} created and scheduled for background processing.")
+    logger.info("Task %s created and scheduled for background processing.", db_task.id)
 
     # 3. 立即返回任务初始信息
     return db_task
@@ -89,7 +117,6 @@ async def create_transcription_task(
 @router.post("/multi-file-transcription", status_code=status.HTTP_202_ACCEPTED, response_model=List[Task])
 async def create_multi_file_transcription_task(
         payload: MultiFileTaskCreate,
-        background_tasks: BackgroundTasks,
         db: Session = Depends(get_db)
 ):
     """为浏览器多选的音视频文件创建转写任务。"""
@@ -97,7 +124,7 @@ async def create_multi_file_transcription_task(
     if not payload.file_paths:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="请至少选择一个文件")
 
-    logger.info(f"Received multi-file transcription request for {len(payload.file_paths)} items")
+    logger.info("Received multi-file transcription request for %s items", len(payload.file_paths))
 
     asr_params = {
         "engine_model_type": payload.engine_model_type,
@@ -106,50 +133,73 @@ async def create_multi_file_transcription_task(
         "hotword_id": payload.hotword_id
     }
 
-    created_tasks: List[Task] = []
-    task_ids: List[uuid.UUID] = []
+    pending_tasks: List[TaskCreate] = []
     errors: List[str] = []
     batch_id = uuid.uuid4()
 
+    candidates: List[tuple[str, str]] = []
     for provided_path in payload.file_paths:
-        absolute_path = provided_path if os.path.isabs(provided_path) else os.path.join(VIDEO_DIRECTORY, provided_path)
+        if os.path.isabs(provided_path):
+            absolute_path = provided_path
+        else:
+            absolute_path = resolve_within_directory(VIDEO_DIRECTORY, provided_path)
+            if absolute_path is None:
+                errors.append(f"Path outside video directory: {provided_path}")
+                logger.warning("Rejected path outside video directory: %s", provided_path)
+                continue
+
+        # 一次 stat 同时判断存在性与文件类型
+        try:
+            is_regular_file = stat.S_ISREG(os.stat(absolute_path).st_mode)
+        except OSError:
+            is_regular_file = False
 
-        if not os.path.isfile(absolute_path):
+        if not is_regular_file:
             errors.append(f"File not found: {provided_path}")
-            logger.warning(f"Skipped non-existent path: {absolute_path}")
+            logger.warning("Skipped non-existent path: %s", absolute_path)
             continue
 
-        try:
-            audio_path = _resolve_audio_path(absolute_path)
-        except Exception as exc:  # noqa: BLE001 - keep detailed feedback
-            error_message = f"Skip {provided_path}: {exc}"
+        candidates.append((provided_path, absolute_path))
+
+    # 多个视频的 ffmpeg 提取并发执行，结果按请求顺序返回，单个文件失败不影响其余文件；
+    # 音频流直接复制属于 I/O 密集型操作，并发上限由 ffmpeg_service 统一配置
+    extraction_semaphore = asyncio.Semaphore(ffmpeg_service.MAX_CONCURRENT_EXTRACTIONS)
+    resolved_paths = await asyncio.gather(
+        *(_resolve_audio_path_bounded(absolute_path, extraction_semaphore) for _, absolute_path in candidates),
+        return_exceptions=True,
+    )
+
+    for (provided_path, _), audio_path in zip(candidates, resolved_paths):
+        if isinstance(audio_path, Exception):
+            error_message = f"Skip {provided_path}: {audio_path}"
             errors.append(error_message)
             logger.warning(error_message)
             continue
 
-        single_task_data = TaskCreate(
+        pending_tasks.append(TaskCreate(
             local_audio_path=audio_path,
             engine_model_type=payload.engine_model_type,
             channel_num=payload.channel_num,
             res_text_format=payload.res_text_format,
             hotword_id=payload.hotword_id,
             batch_id=batch_id,
-        )
+        ))
 
-        db_task = create_task(db=db, task_data=single_task_data)
-        created_tasks.append(db_task)
-        task_ids.append(db_task.id)
+        logger.info("Prepared transcription task for %s -> %s", provided_path, audio_path)
 
-        logger.info(f"Prepared transcription task for {provided_path} -> {audio_path}")
-
-    if not created_tasks:
+    if not pending_tasks:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="未找到可处理的音频或视频文件。")
 
     if errors:
-        logger.warning(f"Some files were skipped: {'; '.join(errors)}")
+        logger.warning("Some files were skipped: %s", '; '.join(errors))
+
+    # 所有任务一次性入库，避免逐条提交
+    created_tasks = bulk_create_tasks(db=db, task_data_list=pending_tasks)
 
-    background_tasks.add_task(transcription_service.run_batch_transcription_pipeline, db, task_ids, asr_params)
+    # 每个文件单独入队：worker 一次只领取一个任务，批量任务与单个任务公平排队，且同样受并发上限约束
+    for db_task in created_tasks:
+        transcription_job_queue.enqueue(transcription_service.run_transcription_pipeline, db_task.id, asr_params)
 
     return created_tasks
 
@@ -158,7 +208,8 @@ async def create_multi_file_transcription_task(
 async def get_recent_tasks(limit: int = 200, db: Session = Depends(get_db)):
     """列出最近的转写任务，按创建时间倒序排列。"""
 
-    return list_tasks(db, limit=limit)
+    tasks = _TASK_LIST_ADAPTER.validate_python(list_tasks(db, limit=limit), from_attributes=True)
+    return Response(content=_TASK_LIST_ADAPTER.dump_json(tasks), media_type="application/json")
 
 
 @router.get("/{task_id}", response_model=Task)
@@ -182,46 +233,29 @@ async def get_batch_transcription_results(
     如果批量任务中所有子任务都已完成，则返回所有转写结果。
     否则，返回一个提示信息，指出任务仍在处理中。
     """
-    logger.info(f"Received request for batch transcription results for batch_id: {batch_id}")
-
-    # 1. 查询该批量ID下的所有任务
-    tasks = get_tasks_by_batch_id(db, batch_id)
+    logger.info("Received request for batch transcription results for batch_id: %s", batch_id)
 
-    # Ensure tasks are processed in order of their original audio path
-    tasks = sorted(tasks, key=lambda task: task.original_audio_path)
+    # 1. 通过聚合查询获取批量任务进度，避免加载全部任务行
+    completed_count, total_count = get_batch_progress(db, batch_id)
 
-    if not tasks:
+    if total_count == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"No tasks found for batch_id: {batch_id}"
         )
 
-    all_completed = True
-    transcription_results_list = []
-    completed_count = 0
-    total_count = len(tasks)
-
-    # 2. 遍历所有任务，检查状态并收集结果
-    for task in tasks:
-        if task.status == TaskStatus.COMPLETED:
-            completed_count += 1
-            if task.transcription_result:  # 确保结果不为空
-                transcription_results_list.append(task.transcription_result)
-        else:
-            all_completed = False  # 发现有未完成的任务
-
-    # 3. 根据是否全部完成构造响应
-    if all_completed:
-        logger.info(f"All {total_count} tasks in batch {batch_id} are completed.")
+    # 2. 根据是否全部完成构造响应，仅在全部完成时查询转写结果
+    if completed_count == total_count:
+        logger.info("All %s tasks in batch %s are completed.", total_count, batch_id)
         return BatchTranscriptionResults(
             batch_id=batch_id,
             status=TaskStatus.COMPLETED,
-            results=transcription_results_list,
+            results=get_batch_results_ordered(db, batch_id),
             completed_count=completed_count,
             total_count=total_count
         )
     else:
-        logger.info(f"Batch {batch_id} is still in progress. {completed_count}/{total_count} tasks completed.")
+        logger.info("Batch %s is still in progress. %s/%s tasks completed.", batch_id, completed_count, total_count)
         return BatchTranscriptionResults(
             batch_id=batch_id,
             status=TaskStatus.PROCESSING,
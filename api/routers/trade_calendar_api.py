@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from crud.trade_calendar_crud import get_trade_calendar_days_in_range
-from database import SessionLocal
+from database import get_db
 from schemas.trade_calendar import (
     TradeCalendarAdjacentResponse,
     TradeCalendarDayItem,
@@ -26,14 +26,6 @@ router = APIRouter(
 )
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/month", response_model=TradeCalendarMonthResponse)
 async def get_trade_calendar_month(
     year: Annotated[int, Query(ge=2000, le=2100)],
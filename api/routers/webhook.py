@@ -1,30 +1,56 @@
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from models.webhook import WebhookPayload
 from services import webhook_service
-from database import SessionLocal
+from database import get_db
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _build_request_schema() -> dict:
+    """生成 WebhookPayload 的请求体 schema，并把 $defs 中的枚举内联，避免 OpenAPI 文档里出现无法解析的引用。"""
+    schema = WebhookPayload.model_json_schema()
+    definitions = schema.pop("$defs", {})
+    for field_schema in schema["properties"].values():
+        ref = field_schema.pop("$ref", None)
+        if ref:
+            field_schema.update(definitions[ref.rsplit("/", 1)[-1]])
+    return schema
+
 
+@router.post(
+    "/webhook",
+    status_code=status.HTTP_200_OK,
+    # 请求体手动解析，这里补上 schema，保持接口文档不变
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": _build_request_schema()}},
+        }
+    },
+)
+async def receive_webhook(request: Request, db: Session = Depends(get_db)):
+    try:
+        # 原始请求体直接交给 pydantic-core 一次完成 JSON 解析和校验，省去 json.loads 生成中间 dict 再校验
+        payload = WebhookPayload.model_validate_json(await request.body())
+    except ValidationError as e:
+        # 与 FastAPI 自动解析请求体时的错误格式保持一致，loc 以 "body" 开头
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)])
 
-@router.post("/webhook", status_code=status.HTTP_200_OK)
-async def receive_webhook(payload: WebhookPayload, db: Session = Depends(get_db)):
     try:
-        return webhook_service.handle_webhook(payload, db)
+        # 推送入队和写库都是阻塞操作，放到线程中执行，避免阻塞事件循环；FileClosed 的 ffmpeg 提取另在后台线程池进行
+        result = await asyncio.to_thread(webhook_service.handle_webhook, payload, db)
+        # 结果是已确定可序列化的普通 dict，直接交给 orjson，跳过 FastAPI 的 jsonable_encoder 递归转换
+        return ORJSONResponse(content=result)
     except Exception as e:
-        logger.exception(f"An unexpected error occurred during webhook processing for EventId={payload.EventId}: {e}")
+        logger.exception("An unexpected error occurred during webhook processing for EventId=%s: %s", payload.EventId, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to process webhook due to an internal server error: {e}"
@@ -1,9 +1,35 @@
 import os
 import logging
+import time
+from functools import lru_cache
 from typing import Tuple, Optional
 
+
+class _CachedTimeFormatter(logging.Formatter):
+    """同一秒内的日志复用已格式化的时间字符串，只补毫秒，减少每条日志的 localtime/strftime 调用。"""
+
+    _cached_time: Tuple[int, str] = (-1, "")
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, cached_text = self._cached_time
+        if cached_second != second:
+            cached_text = time.strftime(self.default_time_format, self.converter(record.created))
+            # 元组整体替换，多线程下读到的秒和文本总是匹配的
+            self._cached_time = (second, cached_text)
+        return self.default_msec_format % (cached_text, record.msecs)
+
+
 # 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(_CachedTimeFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[_log_handler])
+# 日志格式不包含线程和进程信息，关闭对应采集，省去每条 LogRecord 的线程和进程查询
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logger = logging.getLogger(__name__)
 
 # 获取 ServerChan 的 SendKey
@@ -19,6 +45,12 @@ TENCENTCLOUD_COS_REGION = os.getenv("TENCENTCLOUD_COS_REGION")
 # 在容器内，这通常是数据卷映射的目标路径
 VIDEO_DIRECTORY = os.getenv("VIDEO_DIRECTORY", "videos")
 
+# COS 上传接口的最大并发数，超过后请求会排队等待
+COS_MAX_CONCURRENT_UPLOADS = os.getenv("COS_MAX_CONCURRENT_UPLOADS", "16")
+
+# 转写流水线的最大并发任务数，超过后任务在进程内队列中排队
+TRANSCRIPTION_MAX_CONCURRENT_JOBS = os.getenv("TRANSCRIPTION_MAX_CONCURRENT_JOBS", "16")
+
 # FFMPEG 可执行文件路径
 # 在 Docker 中，ffmpeg 通常在系统 PATH 中，所以默认为 'ffmpeg'
 # 在 Windows 本地开发时，可以设置环境变量 FFMPEG_PATH 指向具体的 .exe 文件
@@ -58,11 +90,39 @@ def get_tencentcloud_cos_region() -> str:
     return TENCENTCLOUD_COS_REGION
 
 
+# 环境变量在导入时已读取，解析结果缓存下来，非法值的告警也只输出一次
+@lru_cache(maxsize=1)
+def get_cos_max_concurrent_uploads() -> int:
+    """提供一个函数来获取 COS 上传最大并发数。"""
+    try:
+        return max(1, int(COS_MAX_CONCURRENT_UPLOADS))
+    except (TypeError, ValueError):
+        logger.warning(
+            "Environment variable 'COS_MAX_CONCURRENT_UPLOADS' is invalid: %s. Falling back to 16.",
+            COS_MAX_CONCURRENT_UPLOADS,
+        )
+        return 16
+
+
+@lru_cache(maxsize=1)
+def get_transcription_max_concurrent_jobs() -> int:
+    """提供一个函数来获取转写任务最大并发数。"""
+    try:
+        return max(1, int(TRANSCRIPTION_MAX_CONCURRENT_JOBS))
+    except (TypeError, ValueError):
+        logger.warning(
+            "Environment variable 'TRANSCRIPTION_MAX_CONCURRENT_JOBS' is invalid: %s. Falling back to 16.",
+            TRANSCRIPTION_MAX_CONCURRENT_JOBS,
+        )
+        return 16
+
+
 def get_tushare_token() -> Optional[str]:
     """提供一个函数来获取 TUSHARE_TOKEN"""
     return TUSHARE_TOKEN
 
 
+@lru_cache(maxsize=1)
 def get_tushare_min_interval_seconds() -> float:
     """提供一个函数来获取 Tushare 调用最小间隔秒数。"""
     try:
@@ -1,5 +1,7 @@
 from datetime import date
+from typing import Optional
 
+from sqlalchemy import and_, case, func, select
 from sqlalchemy.orm import Session
 
 from models.settlement import SettlementRecord, SettlementTradeType
@@ -9,6 +11,50 @@ def has_settlement_records(db: Session) -> bool:
     return db.query(SettlementRecord.id).first() is not None
 
 
+def get_first_settlement_record(db: Session) -> Optional[SettlementRecord]:
+    return (
+        db.query(SettlementRecord)
+        .order_by(
+            SettlementRecord.occur_date.asc(),
+            SettlementRecord.occur_time.asc(),
+            SettlementRecord.id.asc(),
+        )
+        .first()
+    )
+
+
+def get_cash_flow_totals_on_or_before(db: Session, target_date: date) -> tuple[int, int, int, int]:
+    """在数据库中聚合 (记录数, 发生金额合计, 银行转证券合计, 证券转银行合计)，单位均为毫。"""
+    amount_milli = SettlementRecord.amount_milli
+    record_count, amount_total, deposit_total, withdrawal_total = (
+        db.query(
+            func.count(),
+            func.sum(amount_milli),
+            func.sum(
+                case(
+                    (
+                        and_(
+                            SettlementRecord.trade_type == SettlementTradeType.BANK_TO_SECURITY.value,
+                            amount_milli > 0,
+                        ),
+                        amount_milli,
+                    ),
+                    else_=0,
+                )
+            ),
+            func.sum(
+                case(
+                    (SettlementRecord.trade_type == SettlementTradeType.SECURITY_TO_BANK.value, func.abs(amount_milli)),
+                    else_=0,
+                )
+            ),
+        )
+        .filter(SettlementRecord.occur_date <= target_date)
+        .one()
+    )
+    return record_count, amount_total or 0, deposit_total or 0, withdrawal_total or 0
+
+
 def list_records_on_or_before(db: Session, target_date: date) -> list[SettlementRecord]:
     return (
         db.query(SettlementRecord)
@@ -22,6 +68,37 @@ def list_records_on_or_before(db: Session, target_date: date) -> list[Settlement
     )
 
 
+def get_position_snapshots_on_or_before(db: Session, target_date: date) -> list[SettlementRecord]:
+    """用窗口函数取每个证券代码截至目标日期的最后一条记录，只返回仍有持仓的，按代码排序。"""
+    ranked = (
+        select(
+            SettlementRecord.id,
+            func.row_number()
+            .over(
+                partition_by=SettlementRecord.security_code,
+                order_by=(
+                    SettlementRecord.occur_date.desc(),
+                    SettlementRecord.occur_time.desc(),
+                    SettlementRecord.id.desc(),
+                ),
+            )
+            .label("row_number"),
+        )
+        .where(SettlementRecord.occur_date <= target_date)
+        .where(SettlementRecord.security_code.isnot(None))
+        .where(SettlementRecord.security_code != "")
+        .subquery()
+    )
+    return (
+        db.query(SettlementRecord)
+        .join(ranked, SettlementRecord.id == ranked.c.id)
+        .filter(ranked.c.row_number == 1)
+        .filter(SettlementRecord.share_balance > 0)
+        .order_by(SettlementRecord.security_code.asc())
+        .all()
+    )
+
+
 def get_trade_records_for_codes_on_or_before(
     db: Session,
     target_date: date,
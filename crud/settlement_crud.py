@@ -1,30 +1,42 @@
 from datetime import date
-from typing import Optional
+from typing import Any, Optional
 
+from sqlalchemy import bindparam, insert, select
 from sqlalchemy.orm import Session
 
 from models.settlement import SettlementRecord
 
 
+SETTLEMENT_HASH_PROBE_CHUNK_SIZE = 500
+
+# expanding 参数让不同长度的分批共用同一条编译好的语句
+_EXISTING_HASHES_STATEMENT = select(SettlementRecord.source_hash).where(
+    SettlementRecord.source_hash.in_(bindparam("hashes", expanding=True))
+)
+
+
 def get_existing_hashes(db: Session, hashes: list[str]) -> set[str]:
-    if not hashes:
-        return set()
+    existing: set[str] = set()
+    # 分批探测，避免大文件导入时超出 SQLite 的绑定参数上限
+    for start in range(0, len(hashes), SETTLEMENT_HASH_PROBE_CHUNK_SIZE):
+        chunk = hashes[start:start + SETTLEMENT_HASH_PROBE_CHUNK_SIZE]
+        existing.update(db.execute(_EXISTING_HASHES_STATEMENT, {"hashes": chunk}).scalars())
+    return existing
 
-    rows = (
-        db.query(SettlementRecord.source_hash)
-        .filter(SettlementRecord.source_hash.in_(hashes))
-        .all()
-    )
-    return {row[0] for row in rows}
+
+SETTLEMENT_INSERT_CHUNK_SIZE = 1000
 
 
-def bulk_create_settlements(db: Session, records: list[SettlementRecord]) -> int:
-    if not records:
+def bulk_create_settlements(db: Session, rows: list[dict[str, Any]]) -> int:
+    if not rows:
         return 0
 
-    db.add_all(records)
+    # 直接用 Core insert 分批 executemany，跳过 ORM 的 unit-of-work 开销，最后统一提交
+    statement = insert(SettlementRecord)
+    for start in range(0, len(rows), SETTLEMENT_INSERT_CHUNK_SIZE):
+        db.execute(statement, rows[start:start + SETTLEMENT_INSERT_CHUNK_SIZE])
     db.commit()
-    return len(records)
+    return len(rows)
 
 
 def list_settlements(
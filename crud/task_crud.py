@@ -1,27 +1,61 @@
 # crud/task_crud.py
 import uuid
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from models.task import TranscriptionTask
+from models.task import TaskStatus, TranscriptionTask
 from schemas.task import TaskCreate
+from utils import uuid7
 
 
 def get_task(db: Session, task_id: uuid.UUID):
     return db.get(TranscriptionTask, task_id)
 
 
+def _commit_new_rows(db: Session) -> None:
+    """
+    提交新插入的任务且不让对象过期。
+    SQLite 3.35+ 下 INSERT ... RETURNING 已回填服务端默认值（如 created_at），提交后无需再 SELECT；
+    只在这次提交临时关闭过期，会话的默认行为不变。
+    """
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+
+
 def create_task(db: Session, task_data: TaskCreate) -> TranscriptionTask:
     db_task = TranscriptionTask(
         original_audio_path=task_data.local_audio_path,
         batch_id=task_data.batch_id
     )
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    _commit_new_rows(db)
     return db_task
 
 
+def bulk_create_tasks(db: Session, task_data_list: list[TaskCreate]) -> list[TranscriptionTask]:
+    """一次提交批量创建任务，按入参顺序返回；服务端默认字段由 INSERT ... RETURNING 回填。"""
+
+    if not task_data_list:
+        return []
+
+    db_tasks = [
+        TranscriptionTask(
+            id=uuid7(),
+            original_audio_path=task_data.local_audio_path,
+            batch_id=task_data.batch_id
+        )
+        for task_data in task_data_list
+    ]
+    db.add_all(db_tasks)
+    _commit_new_rows(db)
+    return db_tasks
+
+
 def update_task(db: Session, task_id: uuid.UUID, updates: dict):
     # 直接使用get获取对象，然后更新属性
     task = db.get(TranscriptionTask, task_id)
@@ -29,8 +63,8 @@ def update_task(db: Session, task_id: uuid.UUID, updates: dict):
         for key, value in updates.items():
             if hasattr(task, key):
                 setattr(task, key, value)
+        # 不再无条件 refresh：提交后对象过期，调用方访问属性时才按需重新加载
         db.commit()
-        db.refresh(task)
         return task
     return None
 
@@ -44,6 +78,37 @@ def get_tasks_by_batch_id(db: Session, batch_id: uuid.UUID):
     )
 
 
+def get_batch_progress(db: Session, batch_id: uuid.UUID) -> tuple[int, int]:
+    """用一条聚合查询返回批量任务的 (已完成数, 总数)。"""
+
+    completed_count, total_count = (
+        db.query(
+            func.count().filter(TranscriptionTask.status == TaskStatus.COMPLETED),
+            func.count(),
+        )
+        .filter(TranscriptionTask.batch_id == batch_id)
+        .one()
+    )
+    return completed_count or 0, total_count or 0
+
+
+def get_batch_results_ordered(db: Session, batch_id: uuid.UUID) -> list[str]:
+    """只查询已完成任务的转写结果列，按原始音频路径排序。"""
+
+    rows = (
+        db.query(TranscriptionTask.transcription_result)
+        .filter(
+            TranscriptionTask.batch_id == batch_id,
+            TranscriptionTask.status == TaskStatus.COMPLETED,
+            TranscriptionTask.transcription_result.isnot(None),
+            TranscriptionTask.transcription_result != "",
+        )
+        .order_by(TranscriptionTask.original_audio_path)
+        .all()
+    )
+    return [row[0] for row in rows]
+
+
 def list_tasks(db: Session, limit: int = 200):
     """按创建时间逆序列出最近的转写任务。"""
 
@@ -1,5 +1,6 @@
 # crud/webhook_event_crud.py
 from typing import Optional
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from models.webhook_event import WebhookEvent
@@ -10,25 +11,46 @@ def create_webhook_event(db: Session, event_data: WebhookEventCreate) -> Webhook
     db_event = WebhookEvent(**event_data.model_dump())
     db.add(db_event)
     db.commit()
-    db.refresh(db_event)
     return db_event
 
 
+def create_webhook_event_if_absent(db: Session, event_data: WebhookEventCreate) -> bool:
+    """INSERT ... ON CONFLICT(event_id) DO NOTHING：由数据库原子地去重，返回是否插入了新记录。"""
+    statement = (
+        sqlite_insert(WebhookEvent)
+        .values(**event_data.model_dump())
+        .on_conflict_do_nothing(index_elements=[WebhookEvent.event_id])
+    )
+    result = db.execute(statement)
+    db.commit()
+    return result.rowcount == 1
+
+
 def update_webhook_event(db: Session, event_id, updates: WebhookEventUpdate) -> Optional[WebhookEvent]:
-    event = db.query(WebhookEvent).filter_by(event_id=event_id).first()
+    event = db.get(WebhookEvent, event_id)
     if not event:
         return None
     for key, value in updates.model_dump(exclude_unset=True).items():
         if hasattr(event, key):
             setattr(event, key, value)
     db.commit()
-    db.refresh(event)
     return event
 
 
 def get_webhook_event_by_event_id(db: Session, event_id) -> Optional[WebhookEvent]:
-    return db.query(WebhookEvent).filter_by(event_id=event_id).first()
+    # event_id 是主键，db.get 先查身份映射，命中时不发 SQL
+    return db.get(WebhookEvent, event_id)
 
 
 def list_webhook_events(db: Session, limit: int = 50, offset: int = 0):
-    return db.query(WebhookEvent).order_by(WebhookEvent.created_at.desc()).offset(offset).limit(limit).all()
\ No newline at end of file
+    return db.query(WebhookEvent).order_by(WebhookEvent.created_at.desc()).offset(offset).limit(limit).all()
+
+
+def list_pending_audio_extractions(db: Session) -> list[WebhookEvent]:
+    """音频提取尚未完成、且有录制文件路径的事件。"""
+    return (
+        db.query(WebhookEvent)
+        .filter(WebhookEvent.audio_extraction_status == "pending")
+        .filter(WebhookEvent.relative_path.isnot(None))
+        .all()
+    )
@@ -1,6 +1,6 @@
 # database.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 # 使用 SQLite
 SQLALCHEMY_DATABASE_URL = "sqlite:///./data/transcription_tasks.db"
@@ -8,14 +8,38 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///./data/transcription_tasks.db"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     # connect_args 是 SQLite 特有的，用于允许多线程访问
-    connect_args={"check_same_thread": False}
+    connect_args={"check_same_thread": False},
 )
 
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, _connection_record):
+    """WAL 模式下读写互不阻塞；写锁冲突时等待而不是立即报 database is locked。"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+
+class Base(DeclarativeBase):
+    """所有 ORM 模型的声明式基类（SQLAlchemy 2.0 风格）。"""
+
+
+def get_db():
+    """FastAPI 依赖：每个请求使用一个会话，请求结束后归还连接。"""
+    with SessionLocal() as db:
+        yield db
 
 
 def create_db_and_tables():
     """在应用启动时创建数据库表"""
     Base.metadata.create_all(bind=engine)
+    # create_all 不会为已存在的表补建索引，这里逐个检查并补齐新增索引
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
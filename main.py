@@ -1,4 +1,8 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from api.routers import (
     webhook,
     cos_api,
@@ -12,6 +16,9 @@ from api.routers import (
 from config import logger  # 导入 config 中的 logger，确保日志配置一致
 from database import create_db_and_tables
 from models import account_snapshot, settlement, trade_calendar  # noqa: F401 - ensure table metadata is registered
+from services.job_queue import transcription_job_queue
+from services.serverchan_dispatcher import serverchan_dispatcher
+from services.webhook_service import resume_pending_audio_extractions, stop_audio_extraction
 
 # 在应用启动时，同步地创建数据库和所有表
 # 这行代码将读取所有继承自 Base 的模型，并在数据库中创建对应的表
@@ -19,10 +26,27 @@ print("Attempting to create database tables...")
 create_db_and_tables()
 print("Database tables creation process finished.")
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # 上次停止时未完成的音频提取重新入队；查询数据库放到线程中，不阻塞事件循环
+    await asyncio.to_thread(resume_pending_audio_extractions)
+    yield
+    # 应用关闭时停止后台任务队列的 worker
+    await transcription_job_queue.stop()
+    # 推送完已入队的 ServerChan 消息再退出
+    await asyncio.to_thread(serverchan_dispatcher.stop, 30)
+    # 等待进行中的音频提取结束，尚未开始的留到下次启动
+    await asyncio.to_thread(stop_audio_extraction)
+
+
 app = FastAPI(
     title="录播姬 Webhook 转 ServerChan",
     description="接收录播姬 Webhook 请求，并将其内容格式化后转发至 ServerChan。",
-    version="2.2.4"
+    version="2.2.4",
+    lifespan=lifespan,
+    # 使用 orjson 序列化 JSON 响应，文件列表、任务列表等大响应编码更快
+    default_response_class=ORJSONResponse,
 )
 
 # 包含 Webhook 路由
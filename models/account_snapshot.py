@@ -6,6 +6,9 @@ from sqlalchemy.sql import func
 
 from database import Base
 
+# 毫转 Decimal 的除数只构造一次
+_DECIMAL_THOUSAND = Decimal(1000)
+
 
 class AccountDailySnapshot(Base):
     __tablename__ = "account_daily_snapshots"
@@ -34,7 +37,7 @@ class AccountDailySnapshot(Base):
     def milli_to_decimal(value: Optional[int]) -> Optional[Decimal]:
         if value is None:
             return None
-        return Decimal(value) / Decimal("1000")
+        return Decimal(value) / _DECIMAL_THOUSAND
 
 
 class AccountDailyPosition(Base):
@@ -1,11 +1,14 @@
 import enum
 from decimal import Decimal
 
-from sqlalchemy import Column, Date, DateTime, Integer, JSON, Numeric, String, Time
+from sqlalchemy import Column, Date, DateTime, Index, Integer, JSON, Numeric, String, Time
 from sqlalchemy.sql import func
 
 from database import Base
 
+# 毫转 Decimal 的除数只构造一次
+_DECIMAL_THOUSAND = Decimal(1000)
+
 
 class SettlementTradeType(str, enum.Enum):
     SECURITY_BUY = "证券买入"
@@ -31,6 +34,10 @@ class SettlementTradeType(str, enum.Enum):
 
 class SettlementRecord(Base):
     __tablename__ = "settlement_records"
+    __table_args__ = (
+        # 列表接口按 occur_date、occur_time、id 倒序分页，复合索引可反向扫描直接按序返回，省去排序
+        Index("ix_settlement_records_occur_date_time_id", "occur_date", "occur_time", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     source_hash = Column(String, nullable=False, unique=True, index=True)
@@ -65,7 +72,7 @@ class SettlementRecord(Base):
 
     @staticmethod
     def _milli_to_decimal(value: int) -> Decimal:
-        return Decimal(value) / Decimal("1000")
+        return Decimal(value) / _DECIMAL_THOUSAND
 
     @property
     def turnover(self) -> Decimal:
@@ -4,11 +4,12 @@ import uuid
 from typing import Optional, List
 
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String, DateTime, Enum as EnumDB
+from sqlalchemy import Column, Integer, String, DateTime, Enum as EnumDB, Index
 from sqlalchemy import UUID
 from sqlalchemy.sql import func
 
 from database import Base
+from utils import uuid7
 
 
 class TaskStatus(enum.Enum):
@@ -22,13 +23,19 @@ class TaskStatus(enum.Enum):
 
 class TranscriptionTask(Base):
     __tablename__ = "transcription_tasks"
+    __table_args__ = (
+        # 批量结果接口按 batch_id 过滤并按原始路径排序，复合索引可直接按序返回
+        Index("ix_transcription_tasks_batch_id_audio_path", "batch_id", "original_audio_path"),
+        # 批量进度按 batch_id 统计各状态数量，(batch_id, status) 覆盖索引无需回表
+        Index("ix_transcription_tasks_batch_id_status", "batch_id", "status"),
+    )
 
     id = Column(
         UUID(as_uuid=True),  # as_uuid=True 确保在 Python 代码中作为 uuid.UUID 对象处理
         primary_key=True,
-        default=uuid.uuid4  # 使用 uuid.uuid4 作为默认值生成函数
+        default=uuid7  # 按时间递增的 UUIDv7，新任务总是追加到主键索引末尾
     )
-    batch_id = Column(UUID(as_uuid=True), index=True, nullable=True)  # 允许为空，因为单个任务可能没有批次ID
+    batch_id = Column(UUID(as_uuid=True), nullable=True)  # 允许为空，因为单个任务可能没有批次ID
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
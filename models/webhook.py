@@ -1,3 +1,4 @@
+from datetime import datetime
 from enum import Enum
 from typing import Dict, Any, Optional
 from pydantic import BaseModel, Field
@@ -16,6 +17,6 @@ class BililiveEventType(str, Enum):
 # 定义 Webhook 请求体的数据模型
 class WebhookPayload(BaseModel):
     EventType: BililiveEventType = Field(..., description="事件类型")
-    EventTimestamp: Optional[str] = Field(None, description="事件时间戳，ISO 8601 格式字符串")
+    EventTimestamp: Optional[datetime] = Field(None, description="事件时间戳，按 ISO 8601 解析")
     EventId: str = Field(..., description="事件的唯一随机ID，可用于判断重复事件")
     EventData: Dict[str, Any] = Field(..., description="事件的详细数据，是一个任意键值对的字典")
@@ -20,7 +20,7 @@ class WebhookEvent(Base):
         nullable=False
     )
     event_type = Column(String, nullable=False, index=True)  # 事件类型
-    event_timestamp = Column(String, nullable=True)  # 原始时间戳字符串
+    event_timestamp = Column(String, nullable=True)  # ISO 8601 时间戳字符串
     created_at = Column(DateTime(timezone=True), server_default=func.now())  # 入库时间
     
     # 房间和主播信息
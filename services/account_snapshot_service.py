@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import logging
+from bisect import bisect_right
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 
 from crud.account_snapshot_crud import (
     delete_snapshots_from_date,
@@ -20,7 +21,7 @@ from crud.account_snapshot_crud import (
     replace_security_prices,
     replace_snapshots,
 )
-from crud.asset_crud import has_settlement_records
+from crud.asset_crud import get_first_settlement_record, has_settlement_records
 from models.account_snapshot import AccountDailyPosition, AccountDailySnapshot, SecurityDailyPrice
 from models.settlement import SettlementRecord, SettlementTradeType
 from schemas.asset import AssetDetailResponse, AssetPositionItem, AssetSnapshotRebuildResponse
@@ -31,6 +32,11 @@ from services.trade_calendar_service import TradeCalendarService, trade_calendar
 
 logger = logging.getLogger(__name__)
 
+# 毫/基点与 Decimal 换算用到的常量只构造一次，避免每次调用都从字符串解析
+_DECIMAL_ONE = Decimal(1)
+_DECIMAL_THOUSAND = Decimal(1000)
+_DECIMAL_TEN_THOUSAND = Decimal(10000)
+
 
 @dataclass
 class PositionState:
@@ -185,8 +191,8 @@ class AccountSnapshotService:
                             (
                                 Decimal(unrealized_pnl_milli)
                                 / Decimal(row.cost_amount_milli)
-                                * Decimal("10000")
-                            ).quantize(Decimal("1"))
+                                * _DECIMAL_TEN_THOUSAND
+                            ).quantize(_DECIMAL_ONE)
                         )
                     else:
                         unrealized_pnl_pct_bp = None
@@ -240,8 +246,23 @@ class AccountSnapshotService:
         if not has_settlement_records(db):
             raise AssetDetailNotFoundError("暂无交割单数据")
 
+        # 重建只用到账本相关字段，不加载 raw_row 等大字段
         records = (
             db.query(SettlementRecord)
+            .options(
+                load_only(
+                    SettlementRecord.occur_date,
+                    SettlementRecord.occur_time,
+                    SettlementRecord.security_code,
+                    SettlementRecord.security_name,
+                    SettlementRecord.market,
+                    SettlementRecord.trade_type,
+                    SettlementRecord.volume,
+                    SettlementRecord.amount_milli,
+                    SettlementRecord.share_balance,
+                    SettlementRecord.cash_balance_milli,
+                )
+            )
             .order_by(
                 SettlementRecord.occur_date.asc(),
                 SettlementRecord.occur_time.asc(),
@@ -275,7 +296,7 @@ class AccountSnapshotService:
         previous_snapshot = get_latest_snapshot_before(db, rebuild_from_date)
         if previous_snapshot is None:
             opening_cash_balance_milli = 0
-            if first_record := self._get_first_settlement_record(db):
+            if first_record := get_first_settlement_record(db):
                 opening_cash_balance_milli = (
                     int(first_record.cash_balance_milli) - int(first_record.amount_milli)
                 )
@@ -367,8 +388,8 @@ class AccountSnapshotService:
                     (
                         Decimal(estimated_net_profit_milli)
                         / Decimal(net_deposit_milli)
-                        * Decimal("10000")
-                    ).quantize(Decimal("1"))
+                        * _DECIMAL_TEN_THOUSAND
+                    ).quantize(_DECIMAL_ONE)
                 )
             snapshots[trade_day] = AccountDailySnapshot(
                 snapshot_date=trade_day,
@@ -388,18 +409,6 @@ class AccountSnapshotService:
 
         return snapshots, positions_by_date
 
-    @staticmethod
-    def _get_first_settlement_record(db: Session) -> Optional[SettlementRecord]:
-        return (
-            db.query(SettlementRecord)
-            .order_by(
-                SettlementRecord.occur_date.asc(),
-                SettlementRecord.occur_time.asc(),
-                SettlementRecord.id.asc(),
-            )
-            .first()
-        )
-
     def _apply_position_record(self, positions: dict[str, PositionState], record: SettlementRecord) -> None:
         if not record.security_code or not self._is_a_share_code(record.security_code):
             return
@@ -456,10 +465,10 @@ class AccountSnapshotService:
                         trade_date=item.trade_date,
                         ts_code=item.ts_code,
                         asset_type=None,
-                        close_milli=self._decimal_to_milli(Decimal(str(item.close))),
-                        open_milli=self._decimal_to_milli(Decimal(str(item.open))),
-                        high_milli=self._decimal_to_milli(Decimal(str(item.high))),
-                        low_milli=self._decimal_to_milli(Decimal(str(item.low))),
+                        close_milli=self._price_to_milli(item.close),
+                        open_milli=self._price_to_milli(item.open),
+                        high_milli=self._price_to_milli(item.high),
+                        low_milli=self._price_to_milli(item.low),
                         source="tushare",
                     )
                 )
@@ -493,9 +502,12 @@ class AccountSnapshotService:
             start_date=start_date,
             end_date=end_date,
         )
+        # 行已按代码、日期升序返回，另存一份日期列表供二分查找
         price_lookup: dict[str, list[SecurityDailyPrice]] = {}
+        price_dates: dict[str, list[date]] = {}
         for row in price_rows:
             price_lookup.setdefault(row.security_code, []).append(row)
+            price_dates.setdefault(row.security_code, []).append(row.trade_date)
 
         for trade_day in trade_days:
             positions = positions_by_date[trade_day]
@@ -503,7 +515,11 @@ class AccountSnapshotService:
             latest_price_trade_date: Optional[date] = None
 
             for position in positions:
-                price_row = self._find_latest_price(price_lookup.get(position.security_code, []), trade_day)
+                price_row = self._find_latest_price(
+                    price_lookup.get(position.security_code, []),
+                    price_dates.get(position.security_code, []),
+                    trade_day,
+                )
                 if price_row is None:
                     continue
 
@@ -516,8 +532,8 @@ class AccountSnapshotService:
                         (
                             Decimal(unrealized_pnl_milli)
                             / Decimal(position.cost_amount_milli)
-                            * Decimal("10000")
-                        ).quantize(Decimal("1"))
+                            * _DECIMAL_TEN_THOUSAND
+                        ).quantize(_DECIMAL_ONE)
                     )
 
                 position.close_price_milli = close_price_milli
@@ -540,23 +556,18 @@ class AccountSnapshotService:
                     (
                         Decimal(snapshot.net_profit_milli)
                         / Decimal(snapshot.net_deposit_milli)
-                        * Decimal("10000")
-                    ).quantize(Decimal("1"))
+                        * _DECIMAL_TEN_THOUSAND
+                    ).quantize(_DECIMAL_ONE)
                 )
             else:
                 snapshot.return_rate_bp = None
 
     @staticmethod
     def _find_latest_price(
-        rows: list[SecurityDailyPrice], target_date: date
+        rows: list[SecurityDailyPrice], trade_dates: list[date], target_date: date
     ) -> Optional[SecurityDailyPrice]:
-        selected = None
-        for row in rows:
-            if row.trade_date <= target_date:
-                selected = row
-            else:
-                break
-        return selected
+        index = bisect_right(trade_dates, target_date)
+        return rows[index - 1] if index else None
 
     @staticmethod
     def _is_a_share_code(security_code: str) -> bool:
@@ -564,17 +575,22 @@ class AccountSnapshotService:
 
     @staticmethod
     def _milli_to_decimal(value: int) -> Decimal:
-        return Decimal(value) / Decimal("1000")
+        return Decimal(value) / _DECIMAL_THOUSAND
 
     @staticmethod
     def _bp_to_ratio(value: Optional[int]) -> Optional[Decimal]:
         if value is None:
             return None
-        return Decimal(value) / Decimal("10000")
+        return Decimal(value) / _DECIMAL_TEN_THOUSAND
+
+    @staticmethod
+    def _price_to_milli(value: float) -> int:
+        # Tushare 日线价格至多三位小数，乘 1000 后与整数的浮点误差远小于 0.5，直接取整与 Decimal 换算结果一致
+        return round(value * 1000)
 
     @staticmethod
     def _decimal_to_milli(value: Decimal) -> int:
-        return int((value * Decimal("1000")).quantize(Decimal("1")))
+        return int((value * _DECIMAL_THOUSAND).quantize(_DECIMAL_ONE))
 
 
 account_snapshot_service = AccountSnapshotService()
@@ -4,7 +4,7 @@ import logging
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Dict, Optional
+from typing import Optional
 from zoneinfo import ZoneInfo
 
 from sqlalchemy.orm import Session
@@ -14,6 +14,9 @@ from crud.account_snapshot_crud import (
     replace_security_prices,
 )
 from crud.asset_crud import (
+    get_cash_flow_totals_on_or_before,
+    get_first_settlement_record,
+    get_position_snapshots_on_or_before,
     get_trade_records_for_codes_on_or_before,
     has_settlement_records,
     list_records_on_or_before,
@@ -30,6 +33,10 @@ from services.trade_calendar_service import TradeCalendarService, trade_calendar
 
 logger = logging.getLogger(__name__)
 
+# 毫与 Decimal 换算用到的常量只构造一次，避免每次调用都从字符串解析
+_DECIMAL_ONE = Decimal(1)
+_DECIMAL_THOUSAND = Decimal(1000)
+
 
 class AssetDetailNotFoundError(LookupError):
     """资产详情数据不存在。"""
@@ -69,15 +76,23 @@ class AssetService:
         if not has_settlement_records(db):
             raise AssetDetailNotFoundError("暂无交割单数据")
 
-        records = list_records_on_or_before(db, resolved_target_date)
-        if not records:
+        # 资金余额和转入/转出合计在数据库中聚合，不再把目标日期前的全部交割记录加载到内存
+        record_count, amount_milli, deposit_milli, withdrawal_milli = get_cash_flow_totals_on_or_before(
+            db, resolved_target_date
+        )
+        if record_count == 0:
             raise AssetDetailNotFoundError("目标日期及之前没有交割记录")
-        logger.info("资产详情交割记录加载完成: target_date=%s, records=%s", resolved_target_date, len(records))
+        logger.info("资产详情资金汇总完成: target_date=%s, records=%s", resolved_target_date, record_count)
 
-        cash_balance_milli_by_record = self._build_cash_balance_milli_by_record(records)
-        cash_balance = self._milli_to_decimal(cash_balance_milli_by_record[records[-1].id])
-        total_deposit, total_withdrawal, net_deposit = self._calculate_cash_flow_metrics(records)
-        position_snapshots = self._extract_position_snapshots(records)
+        first_record = get_first_settlement_record(db)
+        opening_cash_balance_milli = int(first_record.cash_balance_milli) - int(first_record.amount_milli)
+        cash_balance = self._milli_to_decimal(opening_cash_balance_milli + int(amount_milli))
+        total_deposit, total_withdrawal, net_deposit = self._calculate_cash_flow_metrics(
+            int(deposit_milli), int(withdrawal_milli)
+        )
+        position_snapshots = self._extract_position_snapshots(
+            get_position_snapshots_on_or_before(db, resolved_target_date)
+        )
 
         if not position_snapshots:
             logger.info("资产详情无持仓: target_date=%s", resolved_target_date)
@@ -231,33 +246,16 @@ class AssetService:
         return response
 
     @staticmethod
-    def _calculate_cash_flow_metrics(records: list[SettlementRecord]) -> tuple[Decimal, Decimal, Decimal]:
-        deposit_milli = 0
-        withdrawal_milli = 0
-
-        for record in records:
-            if record.trade_type == SettlementTradeType.BANK_TO_SECURITY.value:
-                deposit_milli += max(int(record.amount_milli), 0)
-            elif record.trade_type == SettlementTradeType.SECURITY_TO_BANK.value:
-                withdrawal_milli += abs(int(record.amount_milli))
-
+    def _calculate_cash_flow_metrics(deposit_milli: int, withdrawal_milli: int) -> tuple[Decimal, Decimal, Decimal]:
         total_deposit = AssetService._milli_to_decimal(deposit_milli)
         total_withdrawal = AssetService._milli_to_decimal(withdrawal_milli)
         net_deposit = AssetService._milli_to_decimal(deposit_milli - withdrawal_milli)
         return total_deposit, total_withdrawal, net_deposit
 
     @staticmethod
-    def _extract_position_snapshots(records: list[SettlementRecord]) -> list[SettlementRecord]:
-        latest_by_code: Dict[str, SettlementRecord] = {}
-
-        for record in records:
-            if not record.security_code or not AssetService._is_a_share_code(record.security_code):
-                continue
-            latest_by_code[record.security_code] = record
-
-        snapshots = [record for record in latest_by_code.values() if int(record.share_balance) > 0]
-        snapshots.sort(key=lambda item: item.security_code or "")
-        return snapshots
+    def _extract_position_snapshots(latest_records: list[SettlementRecord]) -> list[SettlementRecord]:
+        # 每个代码的最新记录与持仓过滤、排序已在 SQL 中完成，这里只保留 A 股代码
+        return [record for record in latest_records if AssetService._is_a_share_code(record.security_code)]
 
     @staticmethod
     def _build_cost_basis(trade_records: list[SettlementRecord]) -> dict[str, CostBasisState]:
@@ -459,11 +457,11 @@ class AssetService:
 
     @staticmethod
     def _milli_to_decimal(value: int) -> Decimal:
-        return Decimal(value) / Decimal("1000")
+        return Decimal(value) / _DECIMAL_THOUSAND
 
     @staticmethod
     def _decimal_to_milli(value: Decimal) -> int:
-        return int((value * Decimal("1000")).quantize(Decimal("1")))
+        return int((value * _DECIMAL_THOUSAND).quantize(_DECIMAL_ONE))
 
 
 asset_service = AssetService()
@@ -1,12 +1,19 @@
 # services/ffmpeg_service.py
 import logging
 import os
+import shutil
 import subprocess
 from typing import Optional
 from config import FFMPEG_PATH
 
 logger = logging.getLogger(__name__)
 
+# 启动时解析一次 ffmpeg 的完整路径，避免每次执行都在 PATH 中查找；找不到时保留原值，由执行时报错
+FFMPEG_BIN = shutil.which(FFMPEG_PATH) or FFMPEG_PATH
+
+# -acodec copy 只做解封装、不重新编码，瓶颈在磁盘 I/O 而非 CPU，并发数可以高于 CPU 核数
+MAX_CONCURRENT_EXTRACTIONS = 8
+
 
 def extract_aac_audio(input_video_path: str) -> Optional[str]:
     """
@@ -16,7 +23,7 @@ def extract_aac_audio(input_video_path: str) -> Optional[str]:
     :return: 如果成功，返回提取出的 AAC 文件的路径；如果失败，则返回 None。
     """
     if not os.path.exists(input_video_path):
-        logger.error("Input video file not found: {input_video_path}")
+        logger.error("Input video file not found: %s", input_video_path)
         return None
 
     # 构建输出文件名，将 .flv/.mp4 等后缀替换为 .aac
@@ -26,8 +33,13 @@ def extract_aac_audio(input_video_path: str) -> Optional[str]:
     # -i: 指定输入文件
     # -vn: 禁用视频录制，只处理音频
     # -acodec copy: 直接复制音频流，不进行重新编码，速度最快且无损
+    # -hide_banner/-loglevel error: 不打印版本信息，只输出错误信息，减少 stderr 的输出与捕获量
+    # -nostdin: 不读取标准输入，避免后台运行时等待交互
     command = [
-        FFMPEG_PATH,
+        FFMPEG_BIN,
+        '-hide_banner',
+        '-nostdin',
+        '-loglevel', 'error',
         '-i', input_video_path,
         '-vn',
         '-acodec', 'copy',
@@ -36,29 +48,30 @@ def extract_aac_audio(input_video_path: str) -> Optional[str]:
     ]
 
     try:
-        logger.info("Executing ffmpeg command: {' '.join(command)}")
+        logger.info("Executing ffmpeg command: %s", ' '.join(command))
+        # ffmpeg 不向 stdout 输出内容，只捕获 stderr 用于排错
         result = subprocess.run(
             command,
             check=True,
-            capture_output=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             text=True,
             encoding='utf-8'
         )
-        logger.info("Successfully extracted audio to {output_audio_path}")
+        logger.info("Successfully extracted audio to %s", output_audio_path)
         if result.stderr:
-            # ffmpeg 经常将正常信息输出到 stderr，所以这里用 info 级别记录
-            logger.info("ffmpeg output:{result.stderr}")
+            logger.info("ffmpeg output:%s", result.stderr)
         return output_audio_path
     except FileNotFoundError:
         logger.error("ffmpeg command not found. Is ffmpeg installed and in the system's PATH?")
         return None
     except subprocess.CalledProcessError as e:
-        logger.error("ffmpeg command failed with exit code {e.returncode} for file {input_video_path}")
-        logger.error("ffmpeg stderr:{e.stderr}")
+        logger.error("ffmpeg command failed with exit code %s for file %s", e.returncode, input_video_path)
+        logger.error("ffmpeg stderr:%s", e.stderr)
         # 如果失败，清理可能已创建的空文件
         if os.path.exists(output_audio_path):
             os.remove(output_audio_path)
         return None
     except Exception as e:
-        logger.exception("An unexpected error occurred while extracting audio from {input_video_path}: {e}")
+        logger.exception("An unexpected error occurred while extracting audio from %s: %s", input_video_path, e)
         return None
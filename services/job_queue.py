@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from config import get_transcription_max_concurrent_jobs
+
+logger = logging.getLogger(__name__)
+
+JobFunc = Callable[..., Awaitable[Any]]
+
+
+class BackgroundJobQueue:
+    """进程内后台任务队列：固定数量的 worker 协程逐个消费任务，限制耗时任务的并发数。"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def enqueue(self, func: JobFunc, *args: Any, **kwargs: Any) -> None:
+        """提交一个异步任务，必须在事件循环中调用；worker 在首次提交时启动。"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._start(loop)
+        self._queue.put_nowait((func, args, kwargs))
+        logger.info(
+            "后台任务已入队: job=%s, pending=%s, workers=%s",
+            getattr(func, "__name__", repr(func)),
+            self._queue.qsize(),
+            self.max_workers,
+        )
+
+    async def join(self) -> None:
+        """等待已入队的任务全部执行完毕。"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self) -> None:
+        workers = self._workers
+        self._workers = []
+        self._queue = None
+        self._loop = None
+        for worker in workers:
+            worker.cancel()
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+            logger.info("后台任务队列已停止: workers=%s", len(workers))
+
+    def _start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._workers = [
+            loop.create_task(self._run_worker(self._queue, worker_id))
+            for worker_id in range(self.max_workers)
+        ]
+        logger.info("后台任务队列已启动: workers=%s", self.max_workers)
+
+    @staticmethod
+    async def _run_worker(queue: asyncio.Queue, worker_id: int) -> None:
+        while True:
+            func, args, kwargs = await queue.get()
+            try:
+                await func(*args, **kwargs)
+            except Exception:  # noqa: BLE001 - keep the worker alive for subsequent jobs
+                logger.exception(
+                    "后台任务执行失败: worker=%s, job=%s",
+                    worker_id,
+                    getattr(func, "__name__", repr(func)),
+                )
+            finally:
+                queue.task_done()
+
+
+transcription_job_queue = BackgroundJobQueue(max_workers=get_transcription_max_concurrent_jobs())
@@ -1,13 +1,45 @@
 # services/serverchan.py
+import asyncio
 import logging
+import re
+from functools import lru_cache
 from typing import Dict, Any
 
 import requests
-from serverchan_sdk import sc_send
+from requests.adapters import HTTPAdapter
+
 from config import get_serverchan_send_key
 
 logger = logging.getLogger(__name__)
 
+SERVERCHAN_TIMEOUT_SECONDS = 10
+_SCTP_KEY_RE = re.compile(r"^sctp(\d+)t")
+
+# 复用同一个 Session，保持与 ServerChan 的 keep-alive 连接，避免每条消息都重新握手 TLS
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+# SendKey 在进程生命周期内不变，推送地址解析一次后复用
+@lru_cache(maxsize=4)
+def _build_send_url(send_key: str) -> str:
+    """与 serverchan_sdk.sc_send 的地址规则一致：sctp 开头的 key 走 Server酱³ 地址。"""
+    if send_key.startswith("sctp"):
+        match = _SCTP_KEY_RE.match(send_key)
+        if not match:
+            raise ValueError("Invalid sendkey format for 'sctp'.")
+        return f"https://{match.group(1)}.push.ft07.com/send/{send_key}.send"
+    return f"https://sctapi.ftqq.com/{send_key}.send"
+
+
+def is_configured() -> bool:
+    """是否配置了 SendKey；未配置时任何推送都会失败。"""
+    return bool(get_serverchan_send_key())
+
+
+def not_configured_response() -> Dict[str, Any]:
+    return {"code": -1, "message": "ServerChan SEND_KEY not configured."}
+
 
 def send_serverchan_message(
         title: str,
@@ -22,22 +54,33 @@ def send_serverchan_message(
     send_key = get_serverchan_send_key()
     if not send_key:
         logger.error("ServerChan SEND_KEY is not configured, unable to send message.")
-        return {"code": -1, "message": "ServerChan SEND_KEY not configured."}
+        return not_configured_response()
 
     try:
-        response = sc_send(
-            send_key,
-            title,
-            desp,
-            {"tags": tags, "short": short_description}
+        response = _session.post(
+            _build_send_url(send_key),
+            json={"title": title, "desp": desp, "tags": tags, "short": short_description},
+            timeout=SERVERCHAN_TIMEOUT_SECONDS,
         )
         response.raise_for_status()  # 如果请求失败（非2xx响应），则引发HTTPError
         serverchan_response = response.json()
-        logger.info(f"ServerChan SDK raw response: {serverchan_response}")
+        logger.info("ServerChan raw response: %s", serverchan_response)
         return serverchan_response
     except requests.exceptions.RequestException as e:
-        logger.exception(f"An error occurred while sending message to ServerChan: {e}")
-        return {"code": -2, "message": f"ServerChan SDK call failed: {e}"}
-    except ValueError as e:  # response.json() 可能会引发 ValueError
-        logger.exception(f"Failed to decode ServerChan response: {e}")
-        return {"code": -3, "message": f"Failed to decode ServerChan response: {e}"}
+        logger.exception("An error occurred while sending message to ServerChan: %s", e)
+        return {"code": -2, "message": f"ServerChan request failed: {e}"}
+    except ValueError as e:  # sendkey 格式错误或 response.json() 解析失败
+        logger.exception("Failed to send message to ServerChan: %s", e)
+        return {"code": -3, "message": f"Failed to send message to ServerChan: {e}"}
+
+
+async def send_serverchan_message_async(
+        title: str,
+        desp: str,
+        short_description: str,
+        tags: str
+) -> Dict[str, Any]:
+    """
+    在线程中发送 ServerChan 消息，供异步流程调用，避免阻塞事件循环。
+    """
+    return await asyncio.to_thread(send_serverchan_message, title, desp, short_description, tags)
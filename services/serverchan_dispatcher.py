@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+from services import serverchan
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# ServerChan 标题最长 32 个字符；合并后的简短描述也截断，避免突发时拼出超长卡片
+TITLE_MAX_LENGTH = 32
+MERGED_SHORT_DESCRIPTION_MAX_LENGTH = 64
+
+
+def _truncate(text: str, max_length: int) -> str:
+    return text if len(text) <= max_length else text[:max_length - 1] + "…"
+
+
+class ServerChanDispatcher:
+    """后台推送队列：webhook 入队后立即返回，固定数量的 worker 线程负责把消息发往 ServerChan。"""
+
+    def __init__(self, max_pending: int, max_workers: int, max_batch_size: int = 10):
+        self.max_workers = max(1, max_workers)
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._workers: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def submit(self, title: str, desp: str, short_description: str, tags: str) -> Future:
+        """提交一条消息，返回在推送完成后得到 ServerChan 响应的 Future；队列已满时阻塞等待，形成背压。"""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((future, title, desp, short_description, tags))
+        return future
+
+    def join(self) -> None:
+        """等待已入队的消息全部推送完毕。"""
+        self._queue.join()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """推送完已入队的消息后停止 worker。"""
+        with self._lock:
+            workers = self._workers
+            self._workers = []
+        for _ in workers:
+            self._queue.put(_STOP)
+        for worker in workers:
+            worker.join(timeout)
+        if workers:
+            logger.info("ServerChan 推送队列已停止: workers=%s", len(workers))
+
+    def _ensure_started(self) -> None:
+        if self._workers:
+            return
+        with self._lock:
+            if self._workers:
+                return
+            self._workers = [
+                threading.Thread(target=self._run_worker, name=f"serverchan-{worker_id}", daemon=True)
+                for worker_id in range(self.max_workers)
+            ]
+            for worker in self._workers:
+                worker.start()
+        logger.info("ServerChan 推送队列已启动: workers=%s", self.max_workers)
+
+    def _run_worker(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            stopping = batch[0] is _STOP
+            # 推送期间积压的消息一并取出（不额外等待），突发时合并成一条，减少对 ServerChan 的请求数
+            while not stopping and len(batch) < self.max_batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+                stopping = item is _STOP
+
+            try:
+                # 已取消的消息不再推送
+                messages = [item for item in batch if item is not _STOP and item[0].set_running_or_notify_cancel()]
+                if messages:
+                    response = self._send(*self._merge_messages(messages))
+                    # 合并发送时在每条消息的结果里记下合并条数，便于从事件记录追查是哪次推送
+                    if len(messages) > 1:
+                        response = {"merged": len(messages), **response}
+                    for future, *_ in messages:
+                        future.set_result(response)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stopping:
+                return
+
+    @staticmethod
+    def _merge_messages(messages: list[tuple]) -> tuple[str, str, str, str]:
+        """把多条消息合并成一条：标题为条数加首条标题，正文用分隔线拼接，标签去重。"""
+        if len(messages) == 1:
+            _, title, desp, short_description, tags = messages[0]
+            return title, desp, short_description, tags
+
+        merged_title = _truncate(f"{len(messages)} 条录播通知: {messages[0][1]}", TITLE_MAX_LENGTH)
+        merged_desp = "\n\n---\n\n".join(desp for _, _, desp, _, _ in messages)
+        merged_short = _truncate(
+            "\n".join(short for _, _, _, short, _ in messages), MERGED_SHORT_DESCRIPTION_MAX_LENGTH
+        )
+        merged_tags = "|".join(dict.fromkeys(
+            tag for _, _, _, _, tags in messages for tag in tags.split("|") if tag
+        ))
+        return merged_title, merged_desp, merged_short, merged_tags
+
+    @staticmethod
+    def _send(title: str, desp: str, short_description: str, tags: str) -> Dict[str, Any]:
+        try:
+            return serverchan.send_serverchan_message(title, desp, short_description, tags)
+        except Exception as e:  # noqa: BLE001 - keep the worker alive for subsequent messages
+            logger.exception("ServerChan 推送失败: %s", e)
+            return {"code": -4, "message": f"ServerChan dispatch failed: {e}"}
+
+
+serverchan_dispatcher = ServerChanDispatcher(max_pending=1000, max_workers=4)
@@ -5,27 +5,37 @@ import hashlib
 import io
 import json
 import logging
+import os
 import re
-from datetime import datetime
+from datetime import date, datetime, time as dt_time
 from decimal import Decimal, InvalidOperation
-from typing import Any, Optional
+from typing import Any, Iterable, Optional, Sequence
 
+import orjson
 from sqlalchemy.orm import Session
 
 from crud.settlement_crud import bulk_create_settlements, get_existing_hashes
-from models.settlement import SettlementRecord, SettlementTradeType
+from models.settlement import SettlementTradeType
 from schemas.settlement import SettlementImportResponse
 from services.simple_cache import app_cache
 
 logger = logging.getLogger(__name__)
 
+# 逐行规范化用到的正则、合法交易类别和 Decimal 常量只构造一次
+_EXCEL_TEXT_RE = re.compile(r'=\s*"(.+)"')
+_TRADE_TYPE_VALUES = frozenset(SettlementTradeType.values())
+_DECIMAL_ZERO = Decimal(0)
+_DECIMAL_ONE = Decimal(1)
+_DECIMAL_THOUSAND = Decimal(1000)
+
 
 class SettlementImportError(ValueError):
     """交割单导入失败。"""
 
 
 class SettlementImportService:
-    EXPECTED_HEADERS = [
+    # 以下列定义只读，使用 tuple/frozenset 保证不会被意外修改
+    EXPECTED_HEADERS = (
         "交收日期",
         "发生日期",
         "发生时间",
@@ -47,42 +57,57 @@ class SettlementImportService:
         "流水号",
         "交易市场",
         "币种",
-    ]
+    )
+
+    CSV_ENCODINGS = ("gb18030", "gbk")
 
-    DECIMAL_FIELDS = {
+    DECIMAL_FIELDS = frozenset({
         "成交均价",
-    }
-    INTEGER_FIELDS = {"成交数量", "股份余额"}
+    })
+    INTEGER_FIELDS = frozenset({"成交数量", "股份余额"})
 
-    def parse_csv(self, file_bytes: bytes) -> list[dict[str, str]]:
+    def parse_csv(self, file_bytes: bytes) -> list[list[str]]:
         if not file_bytes:
             raise SettlementImportError("CSV 文件为空")
 
         text = self._decode_csv(file_bytes)
-        reader = csv.reader(io.StringIO(text))
-        rows = list(reader)
-        if not rows:
+        return self._parse_rows(csv.reader(io.StringIO(text)))
+
+    def parse_csv_file(self, file_path: str) -> list[list[str]]:
+        if os.path.getsize(file_path) == 0:
+            raise SettlementImportError("CSV 文件为空")
+
+        for encoding in self.CSV_ENCODINGS:
+            try:
+                with open(file_path, encoding=encoding, newline="") as csv_file:
+                    return self._parse_rows(csv.reader(csv_file))
+            except UnicodeDecodeError:
+                continue
+        raise SettlementImportError("仅支持东方财富导出的 GBK/GB18030 CSV")
+
+    def _parse_rows(self, reader: Iterable[list[str]]) -> list[list[str]]:
+        # 逐行读取，不先把整个文件 list(reader) 成原始行列表，峰值内存只保留清洗后的单元格
+        rows = iter(reader)
+        header_row = next(rows, None)
+        if header_row is None:
             raise SettlementImportError("CSV 文件为空")
 
-        headers = [cell.strip() for cell in rows[0]]
-        effective_headers = [header for header in headers if header]
+        effective_headers = tuple(header for header in (cell.strip() for cell in header_row) if header)
         if effective_headers != self.EXPECTED_HEADERS:
             raise SettlementImportError("CSV 列结构不符合东方财富交割单格式")
 
-        parsed_rows: list[dict[str, str]] = []
+        parsed_rows: list[list[str]] = []
         header_count = len(self.EXPECTED_HEADERS)
+        padding = [""] * header_count
 
-        for row in rows[1:]:
-            if not any(cell.strip() for cell in row):
+        for row in rows:
+            cells = [cell.strip() for cell in row[:header_count]]
+            if not any(cells) and not any(cell.strip() for cell in row[header_count:]):
                 continue
 
-            padded_row = (row[:header_count] + [""] * header_count)[:header_count]
-            parsed_rows.append(
-                {
-                    self.EXPECTED_HEADERS[index]: padded_row[index].strip()
-                    for index in range(header_count)
-                }
-            )
+            # 每个单元格只 strip 一次，不足的列用空字符串补齐；列顺序已由表头校验固定，按位置保留即可
+            cells.extend(padding[len(cells):])
+            parsed_rows.append(cells)
 
         if not parsed_rows:
             raise SettlementImportError("CSV 文件中没有可导入的数据")
@@ -97,40 +122,58 @@ class SettlementImportService:
     ) -> SettlementImportResponse:
         logger.info("开始导入交割单: filename=%s, bytes=%s", filename, len(file_bytes))
         raw_rows = self.parse_csv(file_bytes)
+        return self._import_rows(db, raw_rows, filename)
+
+    def import_csv_file(
+        self,
+        db: Session,
+        file_path: str,
+        filename: str,
+    ) -> SettlementImportResponse:
+        logger.info("开始导入交割单: filename=%s, bytes=%s", filename, os.path.getsize(file_path))
+        raw_rows = self.parse_csv_file(file_path)
+        return self._import_rows(db, raw_rows, filename)
+
+    def _import_rows(
+        self,
+        db: Session,
+        raw_rows: list[list[str]],
+        filename: str,
+    ) -> SettlementImportResponse:
         logger.info("交割单解析完成: filename=%s, raw_rows=%s", filename, len(raw_rows))
 
         deduplicated_rows: dict[str, dict[str, Any]] = {}
         for index, raw_row in enumerate(raw_rows, start=2):
             normalized = self.normalize_row(raw_row, row_number=index)
-            source_hash = self.build_source_hash(normalized)
+            source_hash = normalized["source_hash"]
             if source_hash not in deduplicated_rows:
                 deduplicated_rows[source_hash] = normalized
 
-        file_hashes = list(deduplicated_rows.keys())
         logger.info(
             "交割单文件内去重完成: filename=%s, unique_rows=%s, skipped_in_file=%s",
             filename,
-            len(file_hashes),
-            len(raw_rows) - len(file_hashes),
+            len(deduplicated_rows),
+            len(raw_rows) - len(deduplicated_rows),
         )
-        existing_hashes = get_existing_hashes(db, file_hashes)
+        existing_hashes = get_existing_hashes(db, list(deduplicated_rows))
         logger.info(
             "交割单数据库去重检查完成: filename=%s, existing_rows=%s",
             filename,
             len(existing_hashes),
         )
 
-        records_to_insert = [
-            self._build_model(deduplicated_rows[source_hash])
-            for source_hash in file_hashes
+        # 直接遍历 (hash, row) 对过滤，不再按 hash 回查一次字典
+        rows_to_insert = [
+            normalized
+            for source_hash, normalized in deduplicated_rows.items()
             if source_hash not in existing_hashes
         ]
-        inserted_count = bulk_create_settlements(db, records_to_insert)
+        inserted_count = bulk_create_settlements(db, rows_to_insert)
         if inserted_count > 0:
             app_cache.clear_namespace("asset_detail")
             app_cache.clear_namespace("asset_cash_flows")
             logger.info("交割单导入触发缓存失效: cleared=asset_detail,asset_cash_flows")
-        total_count = len(file_hashes)
+        total_count = len(deduplicated_rows)
         logger.info(
             "交割单导入完成: filename=%s, total=%s, inserted=%s, skipped=%s",
             filename,
@@ -146,32 +189,60 @@ class SettlementImportService:
             skipped_count=total_count - inserted_count,
         )
 
-    def normalize_row(self, raw_row: dict[str, str], row_number: int) -> dict[str, Any]:
+    def normalize_row(self, raw_row: Sequence[str] | dict[str, str], row_number: int) -> dict[str, Any]:
+        if isinstance(raw_row, dict):
+            cells = [raw_row.get(key, "") for key in self.EXPECTED_HEADERS]
+        else:
+            cells = list(raw_row)
+        # 按 EXPECTED_HEADERS 的列顺序解包，避免逐行用中文列名做字典查找
+        (
+            settlement_date,
+            occur_date,
+            occur_time,
+            security_code,
+            security_name,
+            trade_type,
+            volume,
+            price,
+            turnover,
+            amount,
+            commission,
+            other_fee,
+            stamp_duty,
+            transfer_fee,
+            share_balance,
+            cash_balance,
+            trade_no,
+            shareholder_account,
+            serial_no,
+            market,
+            currency,
+        ) = cells
         normalized = {
-            "settlement_date": self._parse_date(raw_row["交收日期"], row_number, "交收日期"),
-            "occur_date": self._parse_date(raw_row["发生日期"], row_number, "发生日期"),
-            "occur_time": self._parse_time(raw_row["发生时间"], row_number, "发生时间"),
-            "security_code": self._normalize_text(raw_row["证券代码"]),
-            "security_name": self._normalize_text(raw_row["证券名称"]),
-            "trade_type": self._parse_trade_type(raw_row["交易类别"], row_number),
-            "volume": self._parse_integer(raw_row["成交数量"], row_number, "成交数量"),
-            "price": self._parse_decimal(raw_row["成交均价"], row_number, "成交均价"),
-            "turnover_milli": self._parse_money_milli(raw_row["成交金额"], row_number, "成交金额"),
-            "amount_milli": self._parse_money_milli(raw_row["发生金额"], row_number, "发生金额"),
-            "commission_milli": self._parse_money_milli(raw_row["佣金"], row_number, "佣金"),
-            "other_fee_milli": self._parse_money_milli(raw_row["其他费用"], row_number, "其他费用"),
-            "stamp_duty_milli": self._parse_money_milli(raw_row["印花税"], row_number, "印花税"),
-            "transfer_fee_milli": self._parse_money_milli(raw_row["过户费"], row_number, "过户费"),
-            "share_balance": self._parse_integer(raw_row["股份余额"], row_number, "股份余额"),
-            "cash_balance_milli": self._parse_money_milli(raw_row["资金余额"], row_number, "资金余额"),
-            "trade_no": self._normalize_text(raw_row["成交编号"]),
-            "shareholder_account": self._normalize_text(raw_row["股东账号"]),
-            "serial_no": self._normalize_text(raw_row["流水号"]),
-            "market": self._normalize_text(raw_row["交易市场"]),
-            "currency": self._normalize_text(raw_row["币种"]),
+            "settlement_date": self._parse_date(settlement_date, row_number, "交收日期"),
+            "occur_date": self._parse_date(occur_date, row_number, "发生日期"),
+            "occur_time": self._parse_time(occur_time, row_number, "发生时间"),
+            "security_code": self._normalize_text(security_code),
+            "security_name": self._normalize_text(security_name),
+            "trade_type": self._parse_trade_type(trade_type, row_number),
+            "volume": self._parse_integer(volume, row_number, "成交数量"),
+            "price": self._parse_decimal(price, row_number, "成交均价"),
+            "turnover_milli": self._parse_money_milli(turnover, row_number, "成交金额"),
+            "amount_milli": self._parse_money_milli(amount, row_number, "发生金额"),
+            "commission_milli": self._parse_money_milli(commission, row_number, "佣金"),
+            "other_fee_milli": self._parse_money_milli(other_fee, row_number, "其他费用"),
+            "stamp_duty_milli": self._parse_money_milli(stamp_duty, row_number, "印花税"),
+            "transfer_fee_milli": self._parse_money_milli(transfer_fee, row_number, "过户费"),
+            "share_balance": self._parse_integer(share_balance, row_number, "股份余额"),
+            "cash_balance_milli": self._parse_money_milli(cash_balance, row_number, "资金余额"),
+            "trade_no": self._normalize_text(trade_no),
+            "shareholder_account": self._normalize_text(shareholder_account),
+            "serial_no": self._normalize_text(serial_no),
+            "market": self._normalize_text(market),
+            "currency": self._normalize_text(currency),
         }
         normalized["source_hash"] = self.build_source_hash(normalized)
-        normalized["raw_row"] = {key: raw_row.get(key, "") for key in self.EXPECTED_HEADERS}
+        normalized["raw_row"] = dict(zip(self.EXPECTED_HEADERS, cells))
         return normalized
 
     def build_source_hash(self, normalized_row: dict[str, Any]) -> str:
@@ -198,15 +269,17 @@ class SettlementImportService:
             "market": normalized_row["market"],
             "currency": normalized_row["currency"],
         }
-        canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
-        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
-
-    def _build_model(self, normalized_row: dict[str, Any]) -> SettlementRecord:
-        return SettlementRecord(**normalized_row)
+        try:
+            # orjson 的 OPT_SORT_KEYS 紧凑输出与下方 json.dumps 逐字节一致，已入库的哈希保持可比
+            canonical = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+        except orjson.JSONEncodeError:
+            # 超出 64 位的整数 orjson 无法序列化，回退到标准库
+            canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return hashlib.sha256(canonical).hexdigest()
 
     @staticmethod
     def _decode_csv(file_bytes: bytes) -> str:
-        for encoding in ("gb18030", "gbk"):
+        for encoding in SettlementImportService.CSV_ENCODINGS:
             try:
                 return file_bytes.decode(encoding)
             except UnicodeDecodeError:
@@ -219,9 +292,11 @@ class SettlementImportService:
         if not text or text == "--":
             return None
 
-        match = re.fullmatch(r'=\s*"(.+)"', text)
-        if match:
-            text = match.group(1).strip()
+        # 只有 Excel 公式写法 ="..." 才需要正则提取，普通文本直接跳过
+        if text[0] == "=":
+            match = _EXCEL_TEXT_RE.fullmatch(text)
+            if match:
+                text = match.group(1).strip()
 
         return text or None
 
@@ -233,29 +308,59 @@ class SettlementImportService:
 
     def _parse_trade_type(self, value: str, row_number: int) -> str:
         text = self._require_text(value, row_number, "交易类别")
-        if text not in SettlementTradeType.values():
+        if text not in _TRADE_TYPE_VALUES:
             raise SettlementImportError(f"第 {row_number} 行字段 交易类别 不支持: {text}")
         return text
 
     @staticmethod
     def _parse_date(value: str, row_number: int, field_name: str):
+        text = value.strip()
+        # 标准的 YYYY-MM-DD 走 C 实现的 fromisoformat，未补零等写法再交给 strptime
+        if len(text) == 10 and text[4] == "-" and text[7] == "-":
+            try:
+                return date.fromisoformat(text)
+            except ValueError:
+                pass
         try:
-            return datetime.strptime(value.strip(), "%Y-%m-%d").date()
+            return datetime.strptime(text, "%Y-%m-%d").date()
         except ValueError as exc:
             raise SettlementImportError(f"第 {row_number} 行字段 {field_name} 日期格式不正确") from exc
 
     @staticmethod
     def _parse_time(value: str, row_number: int, field_name: str):
+        text = value.strip()
+        if len(text) == 8 and text[2] == ":" and text[5] == ":":
+            try:
+                return dt_time.fromisoformat(text)
+            except ValueError:
+                pass
         try:
-            return datetime.strptime(value.strip(), "%H:%M:%S").time()
+            return datetime.strptime(text, "%H:%M:%S").time()
         except ValueError as exc:
             raise SettlementImportError(f"第 {row_number} 行字段 {field_name} 时间格式不正确") from exc
 
     def _parse_integer(self, value: str, row_number: int, field_name: str) -> int:
+        text = value.strip()
+        digits = text[1:] if text.startswith("-") else text
+        # 纯整数直接 int()，带小数等其它写法仍按 Decimal 截断
+        if digits.isascii() and digits.isdigit():
+            return int(text)
         parsed = self._parse_decimal(value, row_number, field_name)
         return int(parsed)
 
     def _parse_money_milli(self, value: str, row_number: int, field_name: str) -> int:
+        text = value.strip()
+        negative = text.startswith("-")
+        integer_part, _, fraction_part = (text[1:] if negative else text).partition(".")
+        # 交割单金额至多三位小数，按定点数直接换算成厘；超出精度或科学计数法等写法交给 Decimal 四舍五入
+        if (
+            integer_part.isascii()
+            and integer_part.isdigit()
+            and len(fraction_part) <= 3
+            and (not fraction_part or (fraction_part.isascii() and fraction_part.isdigit()))
+        ):
+            milli = int(integer_part) * 1000 + int(fraction_part.ljust(3, "0") or "0")
+            return -milli if negative else milli
         parsed = self._parse_decimal(value, row_number, field_name)
         return self._decimal_to_milli(parsed)
 
@@ -263,7 +368,7 @@ class SettlementImportService:
     def _parse_decimal(value: str, row_number: int, field_name: str) -> Decimal:
         text = value.strip()
         if not text:
-            text = "0"
+            return _DECIMAL_ZERO
         try:
             return Decimal(text)
         except InvalidOperation as exc:
@@ -279,7 +384,7 @@ class SettlementImportService:
 
     @staticmethod
     def _decimal_to_milli(value: Decimal) -> int:
-        return int((value * Decimal("1000")).quantize(Decimal("1")))
+        return int((value * _DECIMAL_THOUSAND).quantize(_DECIMAL_ONE))
 
 
 settlement_import_service = SettlementImportService()
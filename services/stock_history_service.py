@@ -274,6 +274,9 @@ class StockHistoryService:
         if isinstance(value, datetime):
             return value.date()
         if isinstance(value, str):
+            # Tushare 的 trade_date 固定为 YYYYMMDD，直接切片取整，避免逐行 strptime 解析格式串
+            if len(value) == 8 and value.isascii() and value.isdigit():
+                return date(int(value[:4]), int(value[4:6]), int(value[6:]))
             return datetime.strptime(value, "%Y%m%d").date()
         raise StockHistoryFetchError("trade_date 格式不支持")
 
@@ -1,6 +1,7 @@
 # services/tencent_cloud_asr.py
 import asyncio
 import json
+import random
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, status
 
@@ -35,6 +36,10 @@ ERROR_CODE_SUGGESTIONS = {
     "MissingParameter": "确认请求中已包含必需的参数字段。",
 }
 
+# 轮询间隔从 interval 开始按此倍数递增，直到 max_interval；每次再叠加 ±20% 抖动，避免多个任务同时轮询
+POLL_BACKOFF_FACTOR = 1.5
+POLL_JITTER_RATIO = 0.2
+
 # 获取腾讯云凭证
 SECRET_ID, SECRET_KEY = get_tencentcloud_credentials()
 
@@ -165,7 +170,8 @@ class TencentCloudASRService:
             params = {"TaskId": task_id}
             req.from_json_string(json.dumps(params))
 
-            resp = client.DescribeTaskStatus(req)
+            # SDK 调用是同步 HTTP 请求，放到线程中执行，轮询期间不阻塞事件循环
+            resp = await asyncio.to_thread(client.DescribeTaskStatus, req)
             logger.info(f"Tencent Cloud ASR task status for Task ID {task_id}: {resp.Data.StatusStr}")
             return resp
 
@@ -183,21 +189,32 @@ class TencentCloudASRService:
             )
 
     @classmethod
-    async def poll_task_status(cls, task_id: int, timeout: int = 10800, interval: int = 5) -> Dict[str, Any]:
+    async def poll_task_status(
+            cls,
+            task_id: int,
+            timeout: int = 10800,
+            interval: int = 5,
+            max_interval: int = 30,
+    ) -> Dict[str, Any]:
         """
         异步轮询 ASR 任务状态，直到完成或超时。
         返回包含任务最终状态和结果的字典。
 
         :param task_id: 语音识别任务ID
         :param timeout: 轮询总超时时间（秒），默认为 600 秒 (10 分钟)
-        :param interval: 轮询间隔时间（秒），默认为 5 秒
+        :param interval: 首次轮询间隔时间（秒），默认为 5 秒，之后按指数退避递增
+        :param max_interval: 轮询间隔上限（秒），默认为 30 秒
         :return: 任务完成后的结果字典，包含 'status', 'result', 'error_msg' 等
         :raises HTTPException: 如果任务失败或超时，或者查询状态时出现问题
         """
         start_time = asyncio.get_event_loop().time()
         logger.info(f"Starting polling for ASR task {task_id} with timeout {timeout}s and interval {interval}s.")
 
+        attempt = 0
         while asyncio.get_event_loop().time() - start_time < timeout:
+            delay = min(max_interval, interval * POLL_BACKOFF_FACTOR ** attempt)
+            delay *= random.uniform(1 - POLL_JITTER_RATIO, 1 + POLL_JITTER_RATIO)
+            attempt += 1
             try:
                 resp = await cls.describe_task_status(task_id)
                 status_str = resp.Data.StatusStr
@@ -223,7 +240,7 @@ class TencentCloudASRService:
                         detail=f"ASR task {task_id} failed: {error_msg}"
                     )
                 else:  # 任务仍在等待或执行中
-                    logger.info(f"ASR task {task_id} status: {status_str}. Polling again in {interval} seconds.")
+                    logger.info(f"ASR task {task_id} status: {status_str}. Polling again in {delay:.1f} seconds.")
 
             except HTTPException as e:
                 # describe_task_status 抛出的 HTTPException 直接向上抛
@@ -236,7 +253,7 @@ class TencentCloudASRService:
                 logger.warning(f"An unexpected error occurred while polling ASR task {task_id}: {e}. Retrying...",
                                exc_info=True)
 
-            await asyncio.sleep(interval)  # 异步等待
+            await asyncio.sleep(delay)  # 异步等待
 
         logger.error(f"ASR task {task_id} timed out after {timeout} seconds.")
         raise HTTPException(
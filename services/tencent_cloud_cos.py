@@ -1,10 +1,31 @@
 # -*- coding=utf--8
 
 import asyncio
+import functools
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from qcloud_cos import CosConfig, CosS3Client, CosClientError, CosServiceError
 # 假设您的 config.py 文件与此文件在同一目录或在 Python 路径中
-from config import get_tencentcloud_cos_credentials, logger
+from config import get_cos_max_concurrent_uploads, get_tencentcloud_cos_credentials, logger
+from services.simple_cache import app_cache
+
+# 单个文件分块上传时使用的线程数（与 SDK 默认值一致）
+COS_UPLOAD_PART_THREADS = 5
+
+# 上传失败后按指数退避重试：0.5s、1s、2s……最长 30s，并叠加 ±20% 抖动
+UPLOAD_RETRY_BASE_DELAY = 0.5
+UPLOAD_RETRY_MAX_DELAY = 30
+UPLOAD_RETRY_JITTER_RATIO = 0.2
+# 4xx 属于请求本身的问题，重试无意义；超时和限流除外
+RETRYABLE_CLIENT_STATUS_CODES = {408, 429}
+
+# 大文件上传会长时间占用线程，使用独立线程池，避免占满默认线程池、阻塞其他 to_thread 调用
+_COS_UPLOAD_EXECUTOR = ThreadPoolExecutor(
+    max_workers=get_cos_max_concurrent_uploads(),
+    thread_name_prefix="cos-upload",
+)
 
 
 class TencentCosService:
@@ -13,6 +34,7 @@ class TencentCosService:
     封装了客户端初始化、文件上传、获取预签名URL等常用操作。
     """
     _instance = None
+    _initialized = False
 
     def __new__(cls, *args, **kwargs):
         """
@@ -27,12 +49,12 @@ class TencentCosService:
         初始化COS客户端。
         从配置文件中获取凭证，并创建S3客户端。
         """
-        # 防止重复初始化
-        self.client = None
-        if hasattr(self, 'client') and self.client is not None:
+        # __new__ 返回的是同一个实例，但 Python 每次都会调用 __init__；初始化成功后不再重复，失败时下次构造会重试
+        if self._initialized:
             return
 
         self.logger = logger
+        self.cache = app_cache
         self.client = None
         self.bucket = None
 
@@ -44,8 +66,20 @@ class TencentCosService:
                 raise ValueError("Tencent COS credentials are not fully configured.")
 
             self.bucket = cos_bucket
-            config = CosConfig(Region=cos_region, SecretId=secret_id, SecretKey=secret_key, Token=None)
+            # SDK 在所有客户端间共享一个 keep-alive 连接池，按上传并发数 x 分块线程数设置池大小，
+            # 避免并发上传时连接池不够用而反复新建 TLS 连接
+            pool_size = get_cos_max_concurrent_uploads() * COS_UPLOAD_PART_THREADS
+            config = CosConfig(
+                Region=cos_region,
+                SecretId=secret_id,
+                SecretKey=secret_key,
+                Token=None,
+                KeepAlive=True,
+                PoolConnections=pool_size,
+                PoolMaxSize=pool_size,
+            )
             self.client = CosS3Client(config)
+            self._initialized = True
 
             self.logger.info("Tencent COS service initialized successfully.")
         except Exception as e:
@@ -81,6 +115,7 @@ class TencentCosService:
                     Bucket=self.bucket,
                     Key=key,
                     LocalFilePath=local_file_path,
+                    MAXThread=COS_UPLOAD_PART_THREADS,
                     EnableMD5=False,  # 根据需要可以开启
                     progress_callback=None
                 )
@@ -88,21 +123,43 @@ class TencentCosService:
                 return True
             except (CosClientError, CosServiceError) as e:
                 self.logger.warning(f"Upload attempt {i + 1}/{retries} failed for key '{key}': {e}")
+                if not self._is_retryable_upload_error(e):
+                    self.logger.error(f"Upload of key '{key}' failed with a non-retryable error.")
+                    return False
                 if i == retries - 1:  # 如果是最后一次尝试
                     self.logger.error(f"Failed to upload key '{key}' after {retries} attempts.")
                     return False
+                time.sleep(self._get_upload_retry_delay(i))
 
         return False  # 循环结束仍未成功
 
+    @staticmethod
+    def _is_retryable_upload_error(error: Exception) -> bool:
+        """网络类错误（CosClientError）和服务端 5xx 可重试，其余 4xx 直接失败。"""
+        if isinstance(error, CosServiceError):
+            status_code = error.get_status_code()
+            return status_code is None or status_code >= 500 or status_code in RETRYABLE_CLIENT_STATUS_CODES
+        return True
+
+    @staticmethod
+    def _get_upload_retry_delay(attempt: int) -> float:
+        delay = min(UPLOAD_RETRY_MAX_DELAY, UPLOAD_RETRY_BASE_DELAY * 2 ** attempt)
+        return delay * random.uniform(1 - UPLOAD_RETRY_JITTER_RATIO, 1 + UPLOAD_RETRY_JITTER_RATIO)
+
     async def upload_file_async(self, local_file_path: str, key: str = None, retries: int = 3) -> bool:
         """
-        Asynchronously uploads a local file to COS using a thread pool.
+        Asynchronously uploads a local file to COS using a dedicated thread pool.
         """
-        return await asyncio.to_thread(self.upload_file, local_file_path, key, retries)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _COS_UPLOAD_EXECUTOR,
+            functools.partial(self.upload_file, local_file_path, key, retries),
+        )
 
     def get_presigned_download_url(self, key: str, expiration_seconds: int = 3600) -> str or None:
         """
         为COS中的对象生成一个预签名的下载URL。
+        相同 bucket/key/有效期 的链接会在内存中缓存，避免重复签名。
 
         :param key: COS中的对象键名（文件名）。
         :param expiration_seconds: URL的有效时间（秒）。默认为1小时。
@@ -112,6 +169,12 @@ class TencentCosService:
             self.logger.error("COS client not initialized. Cannot get presigned URL.")
             return None
 
+        cache_key = self.cache.build_key("cos_presigned_url", (self.bucket, key, expiration_seconds))
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self.logger.info(f"Presigned URL cache hit for key '{key}'.")
+            return cached
+
         try:
             url = self.client.get_presigned_url(
                 Method='GET',
@@ -120,7 +183,13 @@ class TencentCosService:
                 Expired=expiration_seconds
             )
             self.logger.info(f"Generated presigned URL for key '{key}'.")
+            self.cache.set(cache_key, url, ttl_seconds=self._get_presigned_url_cache_ttl(expiration_seconds))
             return url
         except (CosClientError, CosServiceError) as e:
             self.logger.error(f"Failed to generate presigned URL for key '{key}': {e}")
             return None
+
+    @staticmethod
+    def _get_presigned_url_cache_ttl(expiration_seconds: int) -> int:
+        """缓存时长取链接有效期的一半，确保命中缓存返回的链接至少还剩一半有效期。"""
+        return max(expiration_seconds // 2, 0)
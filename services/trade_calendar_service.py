@@ -45,6 +45,8 @@ class TradeCalendarDay:
 class TradeCalendarService:
     def __init__(self, cache: Optional[SimpleTTLCache] = None):
         self.cache = cache or app_cache
+        # token -> Tushare Pro 客户端；客户端只保存 token 和接口地址，可跨请求复用
+        self._pro_clients: Dict[str, Any] = {}
 
     def prewarm_recent_trade_days(
         self,
@@ -265,6 +267,12 @@ class TradeCalendarService:
             raise TradeCalendarFetchError("tushare 依赖未安装") from exc
         return ts
 
+    def _get_pro_client(self, tushare: Any, token: str) -> Any:
+        pro = self._pro_clients.get(token)
+        if pro is None:
+            pro = self._pro_clients[token] = tushare.pro_api(token)
+        return pro
+
     @staticmethod
     def _is_permission_error(exc: Exception) -> bool:
         text = str(exc).lower()
@@ -309,7 +317,7 @@ class TradeCalendarService:
                 end_date,
             )
             with guarded_tushare_call():
-                pro = tushare.pro_api(token)
+                pro = self._get_pro_client(tushare, token)
                 result = pro.trade_cal(
                     exchange=exchange,
                     start_date=start_date.strftime("%Y%m%d"),
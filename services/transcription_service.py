@@ -8,41 +8,41 @@ from sqlalchemy.orm import Session
 
 from config import logger
 from crud import task_crud
+from database import SessionLocal
 from models.task import TaskStatus
 from services import serverchan
 from services.tencent_cloud_asr import TencentCloudASRService
 from services.tencent_cloud_cos import TencentCosService
 
 
-async def run_batch_transcription_pipeline(db: Session, task_ids: list[uuid.UUID], asr_params: dict):
+async def run_transcription_pipeline(task_id: uuid.UUID, asr_params: dict):
     """
-    Concurrently runs the transcription pipeline for a batch of tasks.
+    完整的语音转写任务流程。
+    后台任务在请求结束后才执行，因此使用独立的数据库会话，而不是复用请求作用域的会话。
     """
-    tasks = [run_transcription_pipeline(db, task_id, asr_params) for task_id in task_ids]
-    await asyncio.gather(*tasks)
+    with SessionLocal() as db:
+        await _run_transcription_pipeline(db, task_id, asr_params)
 
 
-async def run_transcription_pipeline(db: Session, task_id: uuid.UUID, asr_params: dict):
-    """
-    完整的语音转写任务流程
-    """
+async def _run_transcription_pipeline(db: Session, task_id: uuid.UUID, asr_params: dict):
     task = None
     try:
         # 1. 更新状态为上传中
         logger.info(f"[Task {task_id}] Status -> UPLOADING")
-        task_crud.update_task(db, task_id, {"status": TaskStatus.UPLOADING})
+        # 先读出路径再提交状态：提交后对象过期、事务结束，上传期间不占用数据库连接
         task = task_crud.get_task(db, task_id)
+        original_audio_path = task.original_audio_path
+        task_crud.update_task(db, task_id, {"status": TaskStatus.UPLOADING})
 
         # 2. 上传文件到 COS
         cos_service = TencentCosService()
-        cos_key = f"{os.path.basename(task.original_audio_path)}"
+        cos_key = f"{os.path.basename(original_audio_path)}"
 
-        success = await cos_service.upload_file_async(local_file_path=task.original_audio_path, key=cos_key)
+        success = await cos_service.upload_file_async(local_file_path=original_audio_path, key=cos_key)
         if not success:
-            raise RuntimeError(f"Failed to upload {task.original_audio_path} to COS.")
+            raise RuntimeError(f"Failed to upload {original_audio_path} to COS.")
 
         logger.info(f"[Task {task_id}] File uploaded to COS. Key: {cos_key}")
-        task_crud.update_task(db, task_id, {"cos_bucket": cos_service.bucket, "cos_key": cos_key})
 
         # 3. 获取 COS 临时链接
         # ASR 服务需要一个可公网访问的链接，预签名URL是最佳选择
@@ -55,9 +55,16 @@ async def run_transcription_pipeline(db: Session, task_id: uuid.UUID, asr_params
 
         # 4. 创建 ASR 任务
         logger.info(f"[Task {task_id}] Status -> AWAITING_ASR. Creating ASR task...")
-        task_crud.update_task(db, task_id, {"status": TaskStatus.AWAITING_ASR})
+        # COS 位置与状态变更合并为一次提交
+        task_crud.update_task(db, task_id, {
+            "cos_bucket": cos_service.bucket,
+            "cos_key": cos_key,
+            "status": TaskStatus.AWAITING_ASR,
+        })
 
-        asr_response = TencentCloudASRService.create_rec_task(
+        # 流水线运行在事件循环的后台 worker 中，同步的 SDK 请求放到线程里，避免拖慢 webhook 等请求
+        asr_response = await asyncio.to_thread(
+            TencentCloudASRService.create_rec_task,
             engine_model_type=asr_params['engine_model_type'],
             channel_num=asr_params['channel_num'],
             res_text_format=asr_params['res_text_format'],
@@ -132,7 +139,7 @@ async def run_transcription_pipeline(db: Session, task_id: uuid.UUID, asr_params
 
         desp = "\n".join(desp_lines)
 
-        serverchan_response = serverchan.send_serverchan_message(
+        serverchan_response = await serverchan.send_serverchan_message_async(
             alert_title,
             desp,
             short_description,
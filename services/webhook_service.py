@@ -1,26 +1,181 @@
 import logging
 import os
+import re
 import uuid
-import json
-from typing import Dict, Any
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, Optional
 
+import orjson
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
 from models.webhook import WebhookPayload, BililiveEventType
-from services import serverchan, ffmpeg_service
-from crud.webhook_event_crud import create_webhook_event, update_webhook_event
+from services import ffmpeg_service, serverchan
+from services.serverchan_dispatcher import serverchan_dispatcher
+from crud.webhook_event_crud import (
+    create_webhook_event_if_absent,
+    list_pending_audio_extractions,
+    update_webhook_event,
+)
+from database import SessionLocal
 from schemas.webhook_event import WebhookEventCreate, WebhookEventUpdate
 from config import VIDEO_DIRECTORY
 from constants import (
-    EMOJI_NOTIFICATION, EMOJI_START, EMOJI_STOP, EMOJI_RECORD,
+    EMOJI_NOTIFICATION, EMOJI_STOP, EMOJI_RECORD,
     EMOJI_FILE_OPEN, EMOJI_FILE_CLOSE, EMOJI_LIVE, EMOJI_OFFLINE,
-    EMOJI_CHECK, EMOJI_CROSS, EMOJI_INFO, EMOJI_BULLET
+    EMOJI_INFO, EMOJI_BULLET
 )
-from utils import format_bool_emoji, format_file_size, format_duration
+from utils import format_bool_emoji, format_file_size, format_duration, uuid7
 
 
 logger = logging.getLogger(__name__)
 
+# 最近处理过的 EventId（按访问顺序淘汰）；handle_webhook 在线程池中执行，需要加锁
+SEEN_EVENT_IDS_MAX_SIZE = 4096
+_seen_event_ids: "OrderedDict[str, None]" = OrderedDict()
+_seen_event_ids_lock = threading.Lock()
+
+# FileClosed 的音频提取可能耗时数分钟，放到后台线程池执行，webhook 请求不再等待 ffmpeg
+# 线程池在首次提交时创建，stop_audio_extraction 关闭后置空，同一进程内再次启动应用时会重新创建
+_AUDIO_EXTRACTION_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_audio_extraction_lock = threading.Lock()
+
+# 复用同一个 TypeAdapter，直接用 dict 校验，省去 __init__ 的关键字参数绑定
+_WEBHOOK_EVENT_CREATE_ADAPTER = TypeAdapter(WebhookEventCreate)
+
+_UUID_RE = re.compile(r"[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}", re.IGNORECASE)
+
+
+def _parse_uuid(value: Any) -> Optional[uuid.UUID]:
+    """先用预编译正则校验格式，合法时再构造 UUID，避免非法输入走异常分支。"""
+    return _parse_uuid_text(str(value) if value is not None else "")
+
+
+def _parse_session_uuid(value: Any) -> Optional[uuid.UUID]:
+    """SessionId 专用：解析结果走缓存。"""
+    return _parse_session_uuid_text(str(value) if value is not None else "")
+
+
+def _parse_uuid_text(text: str) -> Optional[uuid.UUID]:
+    # fullmatch：$ 会放过结尾的换行符
+    if not _UUID_RE.fullmatch(text):
+        return None
+    try:
+        return uuid.UUID(text)
+    except ValueError:
+        return None
+
+
+# 同一场录制的所有事件共用一个 SessionId，缓存后重复出现时直接命中；EventId 每个事件都不同，不走缓存
+_parse_session_uuid_text = lru_cache(maxsize=256)(_parse_uuid_text)
+
+
+# 消息模板在模块加载时拼好，每次只用 format_map 填入动态字段
+_DESP_LINE_SEPARATOR = "\n\n"
+_DESP_BASE_TEMPLATE = _DESP_LINE_SEPARATOR.join([
+    f"# {EMOJI_NOTIFICATION} 录播姬事件通知",
+    "## {event_display_name}",  # 主要事件标题
+    "---",  # 分隔线
+    f"### {EMOJI_INFO} 基本信息",
+    f"{EMOJI_BULLET} **事件类型**: `{{event_type}}`",
+    f"{EMOJI_BULLET} **事件ID**: `{{event_id}}`",
+    f"{EMOJI_BULLET} **事件时间**: `{{event_timestamp}}`",
+    f"{EMOJI_BULLET} **主播**: **`{{name}}`**",
+    f"{EMOJI_BULLET} **直播间**: `{{room_id}}` (短号: `{{short_id}}`)",
+    f"{EMOJI_BULLET} **直播间标题**: `{{title}}`",
+    f"{EMOJI_BULLET} **分区**: `{{area_parent}}` / `{{area_child}}`",
+    f"{EMOJI_BULLET} **当前状态**:",
+    "  {recording} 录制中",
+    "  {streaming} 直播中",
+    "  {danmaku_connected} 弹幕连接",
+])
+_DESP_DETAILS_TITLE = f"\n### {EMOJI_INFO} 事件详情"
+
+
+def _details_template(*lines: str) -> str:
+    """事件详情段落模板，直接拼接在基础信息之后。"""
+    return _DESP_LINE_SEPARATOR + _DESP_LINE_SEPARATOR.join([_DESP_DETAILS_TITLE, *lines])
+
+
+_SESSION_ID_LINE = f"{EMOJI_BULLET} **会话ID**: `{{session_id}}`"
+_RELATIVE_PATH_LINE = f"{EMOJI_BULLET} **相对路径**: `{{relative_path}}`"
+_FILE_OPEN_TIME_LINE = f"{EMOJI_BULLET} **文件打开时间**: `{{file_open_time}}`"
+
+# 事件类型 -> (标题模板, 简短描述模板, 事件显示名, 标签模板, 事件详情模板)
+_EVENT_MESSAGE_TEMPLATES: Dict[BililiveEventType, tuple[str, str, str, str, str]] = {
+    BililiveEventType.SESSION_STARTED: (
+        f"{EMOJI_RECORD} {{name}} 开始录制了！",
+        "主播 {name} (房间: {room_id}) 的直播录制已开始。",
+        "录制开始",
+        "录播姬|{name}|录制开始",
+        _details_template(_SESSION_ID_LINE),
+    ),
+    BililiveEventType.FILE_OPENING: (
+        f"{EMOJI_FILE_OPEN} {{name}} 录制文件已打开",
+        "录制文件 '{relative_path}' 已开始写入。",
+        "文件打开",
+        "录播姬|{name}|文件打开",
+        _details_template(_RELATIVE_PATH_LINE, _FILE_OPEN_TIME_LINE, _SESSION_ID_LINE),
+    ),
+    BililiveEventType.FILE_CLOSED: (
+        f"{EMOJI_FILE_CLOSE} {{name}} 录制文件已关闭",
+        "录制文件 '{relative_path}' 已保存，大小: {file_size}。",
+        "文件关闭",
+        "录播姬|{name}|文件关闭",
+        _details_template(
+            _RELATIVE_PATH_LINE,
+            f"{EMOJI_BULLET} **文件大小**: `{{file_size}}`",
+            f"{EMOJI_BULLET} **持续时间**: `{{duration}}`",
+            _FILE_OPEN_TIME_LINE,
+            f"{EMOJI_BULLET} **文件关闭时间**: `{{file_close_time}}`",
+            _SESSION_ID_LINE,
+        ),
+    ),
+    BililiveEventType.SESSION_ENDED: (
+        f"{EMOJI_STOP} {{name}} 录制结束了！",
+        "主播 {name} (房间: {room_id}) 的直播录制已结束。",
+        "录制结束",
+        "录播姬|{name}|录制结束",
+        _details_template(_SESSION_ID_LINE),
+    ),
+    BililiveEventType.STREAM_STARTED: (
+        f"{EMOJI_LIVE} {{name}} 开始直播了！",
+        "主播 {name} (房间: {room_id}) 正在直播: {title}。",
+        "直播开始",
+        "录播姬|{name}|直播开始",
+        "",
+    ),
+    BililiveEventType.STREAM_ENDED: (
+        f"{EMOJI_OFFLINE} {{name}} 直播结束了！",
+        "主播 {name} (房间: {room_id}) 的直播已结束。",
+        "直播结束",
+        "录播姬|{name}|直播结束",
+        "",
+    ),
+}
+
+
+def _unknown_event_details(event_data: Dict[str, Any]) -> str:
+    specific_details = []
+    if event_data:
+        specific_details.append("\n### 未知事件原始数据")
+        for key, value in event_data.items():
+            if isinstance(value, (dict, list)):
+                try:
+                    # orjson 输出 UTF-8（等同 ensure_ascii=False），序列化失败抛出的 JSONEncodeError 是 TypeError 的子类
+                    formatted_value = orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+                    specific_details.append(f"- **{key}**: ```json\n{formatted_value}\n```")
+                except TypeError:
+                    specific_details.append(f"- **{key}**: `{repr(value)}` (无法格式化为JSON)")
+            else:
+                specific_details.append(f"- **{key}**: `{value}`")
+    else:
+        specific_details.append("无具体事件数据。")
+    return _details_template(*specific_details)
+
 
 def _generate_serverchan_message(payload: WebhookPayload) -> Dict[str, Any]:
     """
@@ -28,124 +183,46 @@ def _generate_serverchan_message(payload: WebhookPayload) -> Dict[str, Any]:
     返回一个字典，包含 'serverchan_title', 'desp', 'short_description', 'tags'。
     """
     event_data = payload.EventData
-    room_id = event_data.get("RoomId", "N/A")
-    short_id = event_data.get("ShortId", "N/A")
-    name = event_data.get("Name", "未知主播")
-    title = event_data.get("Title", "未知标题")
-    area_parent = event_data.get("AreaNameParent", "N/A")
-    area_child = event_data.get("AreaNameChild", "N/A")
-
-    tags = f"录播姬|{name}"
-    serverchan_title = ""
-    short_description = ""
-    event_display_name = ""
-    specific_details = []
+    get = event_data.get  # 绑定一次，后面十几次取值走局部变量
+    event_type = payload.EventType
+    event_type_value = event_type.value
+    fields = {
+        "event_type": event_type_value,
+        "event_id": payload.EventId,
+        "event_timestamp": payload.EventTimestamp.isoformat() if payload.EventTimestamp else "N/A",
+        "name": get("Name", "未知主播"),
+        "room_id": get("RoomId", "N/A"),
+        "short_id": get("ShortId", "N/A"),
+        "title": get("Title", "未知标题"),
+        "area_parent": get("AreaNameParent", "N/A"),
+        "area_child": get("AreaNameChild", "N/A"),
+        "recording": format_bool_emoji(get("Recording")),
+        "streaming": format_bool_emoji(get("Streaming")),
+        "danmaku_connected": format_bool_emoji(get("DanmakuConnected")),
+        "session_id": get("SessionId", "N/A"),
+        "relative_path": get("RelativePath", "N/A"),
+        "file_open_time": get("FileOpenTime", "N/A"),
+    }
 
-    if payload.EventType == BililiveEventType.SESSION_STARTED:
-        session_id = event_data.get("SessionId", "N/A")
-        serverchan_title = f"{EMOJI_RECORD} {name} 开始录制了！"
-        short_description = f"主播 {name} (房间: {room_id}) 的直播录制已开始。"
-        event_display_name = "录制开始"
-        tags += "|录制开始"
-        specific_details = [
-            f"{EMOJI_BULLET} **会话ID**: `{session_id}`"
-        ]
-    elif payload.EventType == BililiveEventType.FILE_OPENING:
-        relative_path = event_data.get("RelativePath", "N/A")
-        file_open_time = event_data.get("FileOpenTime", "N/A")
-        session_id = event_data.get("SessionId", "N/A")
-        serverchan_title = f"{EMOJI_FILE_OPEN} {name} 录制文件已打开"
-        short_description = f"录制文件 '{relative_path}' 已开始写入。"
-        event_display_name = "文件打开"
-        tags += "|文件打开"
-        specific_details = [
-            f"{EMOJI_BULLET} **相对路径**: `{relative_path}`",
-            f"{EMOJI_BULLET} **文件打开时间**: `{file_open_time}`",
-            f"{EMOJI_BULLET} **会话ID**: `{session_id}`"
-        ]
-    elif payload.EventType == BililiveEventType.FILE_CLOSED:
-        relative_path = event_data.get("RelativePath", "N/A")
-        file_size = event_data.get("FileSize")
-        duration = event_data.get("Duration")
-        file_open_time = event_data.get("FileOpenTime", "N/A")
-        file_close_time = event_data.get("FileCloseTime", "N/A")
-        session_id = event_data.get("SessionId", "N/A")
-        serverchan_title = f"{EMOJI_FILE_CLOSE} {name} 录制文件已关闭"
-        short_description = f"录制文件 '{relative_path}' 已保存，大小: {format_file_size(file_size)}。"
-        event_display_name = "文件关闭"
-        tags += "|文件关闭"
-        specific_details = [
-            f"{EMOJI_BULLET} **相对路径**: `{relative_path}`",
-            f"{EMOJI_BULLET} **文件大小**: `{format_file_size(file_size)}`",
-            f"{EMOJI_BULLET} **持续时间**: `{format_duration(duration)}`",
-            f"{EMOJI_BULLET} **文件打开时间**: `{file_open_time}`",
-            f"{EMOJI_BULLET} **文件关闭时间**: `{file_close_time}`",
-            f"{EMOJI_BULLET} **会话ID**: `{session_id}`"
-        ]
-    elif payload.EventType == BililiveEventType.SESSION_ENDED:
-        session_id = event_data.get("SessionId", "N/A")
-        serverchan_title = f"{EMOJI_STOP} {name} 录制结束了！"
-        short_description = f"主播 {name} (房间: {room_id}) 的直播录制已结束。"
-        event_display_name = "录制结束"
-        tags += "|录制结束"
-        specific_details = [
-            f"{EMOJI_BULLET} **会话ID**: `{session_id}`"
-        ]
-    elif payload.EventType == BililiveEventType.STREAM_STARTED:
-        serverchan_title = f"{EMOJI_LIVE} {name} 开始直播了！"
-        short_description = f"主播 {name} (房间: {room_id}) 正在直播: {title}。"
-        event_display_name = "直播开始"
-        tags += "|直播开始"
-        specific_details = []
-    elif payload.EventType == BililiveEventType.STREAM_ENDED:
-        serverchan_title = f"{EMOJI_OFFLINE} {name} 直播结束了！"
-        short_description = f"主播 {name} (房间: {room_id}) 的直播已结束。"
-        event_display_name = "直播结束"
-        tags += "|直播结束"
-        specific_details = []
+    templates = _EVENT_MESSAGE_TEMPLATES.get(event_type)
+    if templates is None:
+        serverchan_title = f"{EMOJI_NOTIFICATION} {fields['name']} - 未知录播姬事件"
+        short_description = f"收到未知录播姬事件: {event_type_value}"
+        fields["event_display_name"] = f"未知事件: {event_type_value}"
+        tags = f"录播姬|{fields['name']}|未知事件"
+        desp = _DESP_BASE_TEMPLATE.format_map(fields) + _unknown_event_details(event_data)
     else:
-        serverchan_title = f"{EMOJI_NOTIFICATION} {name} - 未知录播姬事件"
-        short_description = f"收到未知录播姬事件: {payload.EventType.value}"
-        event_display_name = f"未知事件: {payload.EventType.value}"
-        tags += "|未知事件"
-        specific_details = []
-        if event_data:
-            specific_details.append("\n### 未知事件原始数据")
-            for key, value in event_data.items():
-                if isinstance(value, (dict, list)):
-                    try:
-                        formatted_value = json.dumps(value, indent=2, ensure_ascii=False)
-                        specific_details.append(f"- **{key}**: ```json\n{formatted_value}\n```")
-                    except TypeError:
-                        specific_details.append(f"- **{key}**: `{repr(value)}` (无法格式化为JSON)")
-                else:
-                    specific_details.append(f"- **{key}**: `{value}`")
-        else:
-            specific_details.append("无具体事件数据。")
-
-    # 构造 ServerChan 的消息内容 (desp)，使用 Markdown 格式
-    desp_lines = [
-        f"# {EMOJI_NOTIFICATION} 录播姬事件通知",
-        f"## {event_display_name}",  # 主要事件标题
-        f"---",  # 分隔线
-        f"### {EMOJI_INFO} 基本信息",
-        f"{EMOJI_BULLET} **事件类型**: `{payload.EventType.value}`",
-        f"{EMOJI_BULLET} **事件ID**: `{payload.EventId}`",
-        f"{EMOJI_BULLET} **事件时间**: `{payload.EventTimestamp if payload.EventTimestamp else 'N/A'}`",
-        f"{EMOJI_BULLET} **主播**: **`{name}`**",
-        f"{EMOJI_BULLET} **直播间**: `{room_id}` (短号: `{short_id}`)",
-        f"{EMOJI_BULLET} **直播间标题**: `{title}`",
-        f"{EMOJI_BULLET} **分区**: `{area_parent}` / `{area_child}`",
-        f"{EMOJI_BULLET} **当前状态**:",
-        f"  {format_bool_emoji(event_data.get('Recording'))} 录制中",
-        f"  {format_bool_emoji(event_data.get('Streaming'))} 直播中",
-        f"  {format_bool_emoji(event_data.get('DanmakuConnected'))} 弹幕连接",
-    ]
-    # 添加事件特有的详细信息
-    if specific_details:
-        desp_lines.append(f"\n### {EMOJI_INFO} 事件详情")
-        desp_lines.extend(specific_details)
-    desp = "\n\n".join(desp_lines)
+        title_template, short_description_template, event_display_name, tags_template, details_template = templates
+        if event_type == BililiveEventType.FILE_CLOSED:
+            fields["file_size"] = format_file_size(get("FileSize"))
+            fields["duration"] = format_duration(get("Duration"))
+            fields["file_close_time"] = get("FileCloseTime", "N/A")
+        fields["event_display_name"] = event_display_name
+        serverchan_title = title_template.format_map(fields)
+        short_description = short_description_template.format_map(fields)
+        tags = tags_template.format_map(fields)
+        # 构造 ServerChan 的消息内容 (desp)，使用 Markdown 格式
+        desp = _DESP_BASE_TEMPLATE.format_map(fields) + details_template.format_map(fields)
 
     return {
         "serverchan_title": serverchan_title,
@@ -155,110 +232,287 @@ def _generate_serverchan_message(payload: WebhookPayload) -> Dict[str, Any]:
     }
 
 
+def _remember_event_id(event_id: str) -> bool:
+    """记录 EventId；最近已处理过时返回 False。"""
+    with _seen_event_ids_lock:
+        if event_id in _seen_event_ids:
+            _seen_event_ids.move_to_end(event_id)
+            return False
+        _seen_event_ids[event_id] = None
+        if len(_seen_event_ids) > SEEN_EVENT_IDS_MAX_SIZE:
+            _seen_event_ids.popitem(last=False)
+        return True
+
+
+def _forget_event_id(event_id: str) -> None:
+    with _seen_event_ids_lock:
+        _seen_event_ids.pop(event_id, None)
+
+
 def handle_webhook(payload: WebhookPayload, db: Session):
-    logger.info(f"Handling webhook: EventType={payload.EventType.value}, EventId={payload.EventId}")
+    logger.info("Handling webhook: EventType=%s, EventId=%s", payload.EventType.value, payload.EventId)
+
+    # 录播姬重试时 EventId 不变，最近处理过的事件直接返回，不再格式化消息和重复推送
+    if not _remember_event_id(payload.EventId):
+        logger.info("Duplicate webhook ignored. EventId=%s", payload.EventId)
+        return {
+            "message": "Duplicate webhook ignored.",
+            "serverchan_status": "duplicate",
+            "serverchan_detail": None
+        }
 
     try:
-        # 使用 webhook_processor 处理 webhook 负载，生成 ServerChan 消息详情
+        # 未配置 SendKey 时推送必然失败：不再生成消息正文和入队，直接记录失败结果
+        if not serverchan.is_configured():
+            logger.warning("ServerChan SEND_KEY is not configured, skipping message for EventId=%s", payload.EventId)
+            prepared_event = _prepare_webhook_event(payload)
+            saved = _save_webhook_event(db, payload, prepared_event, serverchan.not_configured_response(), {})
+            _schedule_audio_extraction(payload, prepared_event, saved)
+            return {
+                "message": "Webhook received, ServerChan is not configured.",
+                "serverchan_status": "not_configured",
+                "serverchan_detail": None
+            }
+
+        # 根据 webhook 负载生成 ServerChan 消息详情
         message_details = _generate_serverchan_message(payload)
 
-        # 调用 ServerChan 服务发送消息
-        serverchan_response = serverchan.send_serverchan_message(
+        # 先以 pending 状态记录事件，再交给后台推送队列；推送结果回写时记录一定已经存在
+        prepared_event = _prepare_webhook_event(payload)
+        saved = _save_webhook_event(db, payload, prepared_event, None, message_details)
+        # 插入被冲突忽略：其他请求已经记录并推送过这个事件（如进程重启后录播姬重试）
+        if saved is False:
+            return {
+                "message": "Duplicate webhook ignored.",
+                "serverchan_status": "duplicate",
+                "serverchan_detail": None
+            }
+        # 写库失败时仍然推送，只是不回写结果
+        event_id = prepared_event["event_id"] if saved else None
+
+        # 不等待 ServerChan 响应，推送完成后再回写结果
+        send_future = serverchan_dispatcher.submit(
             message_details["serverchan_title"],
             message_details["desp"],
             message_details["short_description"],
             message_details["tags"]
         )
+        send_future.add_done_callback(
+            lambda future: _record_serverchan_result(payload.EventId, event_id, future.result())
+        )
 
-        # 记录 webhook 事件到数据库
-        persist_webhook_event(db, payload, serverchan_response, message_details)
+        _schedule_audio_extraction(payload, prepared_event, saved)
 
-        # 根据 ServerChan 的响应判断是否成功
-        if serverchan_response and serverchan_response.get("code") == 0:
-            logger.info(f"Message for EventId={payload.EventId} successfully forwarded to ServerChan.")
-            return {
-                "message": "Webhook received and forwarded to ServerChan successfully.",
-                "serverchan_status": "success",
-                "serverchan_detail": serverchan_response
-            }
-        else:
-            error_message = (serverchan_response or {}).get("message", "Unknown error from ServerChan.")
-            logger.error(f"Failed to send message for EventId={payload.EventId} to ServerChan: {error_message}")
-            return {
-                "message": "Webhook received, but ServerChan forwarding failed.",
-                "serverchan_status": "failure",
-                "serverchan_detail": serverchan_response
-            }
+        return {
+            "message": "Webhook received, ServerChan forwarding queued.",
+            "serverchan_status": "queued",
+            "serverchan_detail": None
+        }
     except Exception as e:
-        logger.exception(f"An unexpected error occurred during webhook processing for EventId={payload.EventId}: {e}")
+        logger.exception("An unexpected error occurred during webhook processing for EventId=%s: %s", payload.EventId, e)
+        # 处理失败时允许录播姬重试
+        _forget_event_id(payload.EventId)
         raise
 
 
-def persist_webhook_event(db: Session, payload: WebhookPayload, serverchan_response: dict, message_details: dict):
+def _serverchan_sent_status(serverchan_response: Optional[dict]) -> str:
+    if serverchan_response is None:
+        return "pending"
+    return "success" if serverchan_response.get("code") == 0 else "failure"
+
+
+def _record_serverchan_result(raw_event_id: str, event_id: Optional[uuid.UUID], serverchan_response: dict):
+    """推送完成后记录日志，并把结果回写到事件记录；事件未入库（重复或出错）时只记录日志。"""
+    sent_status = _serverchan_sent_status(serverchan_response)
+    if sent_status == "success":
+        logger.info("Message for EventId=%s successfully forwarded to ServerChan.", raw_event_id)
+    else:
+        error_message = (serverchan_response or {}).get("message", "Unknown error from ServerChan.")
+        logger.error("Failed to send message for EventId=%s to ServerChan: %s", raw_event_id, error_message)
+
+    if event_id is None:
+        return
+    # 两个字段都由本服务生成、类型已确定，用 model_construct 跳过校验
+    updates = WebhookEventUpdate.model_construct(serverchan_sent=sent_status, serverchan_response=serverchan_response)
     try:
-        event_data = payload.EventData or {}
+        with SessionLocal() as db:
+            update_webhook_event(db, event_id, updates)
+    except Exception as e:
+        logger.exception("Failed to record ServerChan result for EventId=%s: %s", raw_event_id, e)
+
 
+def _schedule_audio_extraction(payload: WebhookPayload, prepared_event: Optional[Dict[str, Any]], saved: bool):
+    """FileClosed 事件入库后，把音频提取交给后台线程池，完成后再回写提取结果。"""
+    relative_path = (payload.EventData or {}).get("RelativePath")
+    if saved and payload.EventType == BililiveEventType.FILE_CLOSED and relative_path:
+        # 记录已经提交，提交失败时不能再让请求报错；记录保持 pending，下次启动时重新提取
         try:
-            _event_id = uuid.UUID(payload.EventId)
-        except (ValueError, TypeError):
-            logger.warning(f"Invalid EventId format, cannot parse to UUID: {payload.EventId}")
-            _event_id = uuid.uuid4()
+            _submit_audio_extraction(payload.EventId, prepared_event["event_id"], relative_path)
+        except Exception as e:
+            logger.exception("Failed to schedule audio extraction for EventId=%s, left pending: %s", payload.EventId, e)
+
+
+def _submit_audio_extraction(raw_event_id: str, event_id: uuid.UUID, relative_path: str) -> None:
+    global _AUDIO_EXTRACTION_EXECUTOR
+    # 与 stop_audio_extraction 共用一把锁，不会提交到已关闭的线程池
+    with _audio_extraction_lock:
+        if _AUDIO_EXTRACTION_EXECUTOR is None:
+            _AUDIO_EXTRACTION_EXECUTOR = ThreadPoolExecutor(
+                max_workers=ffmpeg_service.MAX_CONCURRENT_EXTRACTIONS,
+                thread_name_prefix="audio-extract",
+            )
+        _AUDIO_EXTRACTION_EXECUTOR.submit(_extract_and_record_audio, raw_event_id, event_id, relative_path)
+
+
+def resume_pending_audio_extractions() -> int:
+    """
+    重新提交上次停止时尚未完成的音频提取（记录仍为 pending），返回提交的任务数。
+    应用启动时调用。
+    """
+    with SessionLocal() as db:
+        pending_events = list_pending_audio_extractions(db)
+    for event in pending_events:
+        _submit_audio_extraction(str(event.event_id), event.event_id, event.relative_path)
+    if pending_events:
+        logger.info("Resumed %s pending audio extraction(s).", len(pending_events))
+    return len(pending_events)
+
+
+def stop_audio_extraction() -> None:
+    """
+    取消尚未开始的音频提取，等待进行中的 ffmpeg 结束后停止线程池。
+    被取消的记录保持 pending，下次启动时由 resume_pending_audio_extractions 重新提取。
+    """
+    global _AUDIO_EXTRACTION_EXECUTOR
+    with _audio_extraction_lock:
+        executor, _AUDIO_EXTRACTION_EXECUTOR = _AUDIO_EXTRACTION_EXECUTOR, None
+    if executor is None:
+        return
+    logger.info("Stopping audio extraction executor, waiting for running ffmpeg jobs...")
+    executor.shutdown(wait=True, cancel_futures=True)
+    logger.info("Audio extraction executor stopped.")
+
+
+def _extract_audio(relative_path: str) -> tuple[str, Optional[str]]:
+    """提取录制文件的音频，返回 (提取状态, 音频路径)。"""
+    video_path = os.path.join(VIDEO_DIRECTORY, relative_path)
+    logger.info("FileClosed event: Starting audio extraction for %s", video_path)
+    extracted_audio_path = ffmpeg_service.extract_aac_audio(video_path)
+    if extracted_audio_path:
+        logger.info("Audio extraction successful for %s. Output: %s", video_path, extracted_audio_path)
+        return "success", extracted_audio_path
+    logger.error("Audio extraction failed for %s", video_path)
+    return "failure", None
+
+
+def _extract_and_record_audio(raw_event_id: str, event_id: uuid.UUID, relative_path: str):
+    """后台线程中提取音频，并把结果回写到已入库的事件记录。"""
+    try:
+        audio_extraction_status, extracted_audio_path = _extract_audio(relative_path)
+        updates = WebhookEventUpdate.model_construct(
+            audio_extraction_status=audio_extraction_status,
+            extracted_audio_path=extracted_audio_path,
+        )
+        with SessionLocal() as db:
+            update_webhook_event(db, event_id, updates)
+    except Exception as e:
+        logger.exception("Failed to extract audio for EventId=%s: %s", raw_event_id, e)
+
+
+# WebhookEventCreate 字段 -> EventData 键，一次 map(event_data.get, ...) 取出全部值
+_EVENT_DATA_FIELDS = (
+    ("room_id", "RoomId"),
+    ("short_id", "ShortId"),
+    ("streamer_name", "Name"),
+    ("room_title", "Title"),
+    ("area_parent", "AreaNameParent"),
+    ("area_child", "AreaNameChild"),
+    ("recording", "Recording"),
+    ("streaming", "Streaming"),
+    ("danmaku_connected", "DanmakuConnected"),
+    ("relative_path", "RelativePath"),
+    ("file_size", "FileSize"),
+    ("duration", "Duration"),
+    ("file_open_time", "FileOpenTime"),
+    ("file_close_time", "FileCloseTime"),
+)
+_EVENT_DATA_COLUMNS = tuple(column for column, _ in _EVENT_DATA_FIELDS)
+_EVENT_DATA_KEYS = tuple(key for _, key in _EVENT_DATA_FIELDS)
+# 这些字段在库中以字符串存储
+_STRINGIFIED_COLUMNS = ("room_id", "short_id", "recording", "streaming", "danmaku_connected", "file_size", "duration")
+
+
+def _extract_event_columns(event_data: Dict[str, Any]) -> Dict[str, Any]:
+    columns = dict(zip(_EVENT_DATA_COLUMNS, map(event_data.get, _EVENT_DATA_KEYS)))
+    for column in _STRINGIFIED_COLUMNS:
+        value = columns[column]
+        if value is not None:
+            columns[column] = str(value)
+    return columns
+
+
+def _prepare_webhook_event(payload: WebhookPayload) -> Optional[Dict[str, Any]]:
+    """
+    解析 ID，出错时返回 None；是否重复由入库时的冲突忽略判断。
+    FileClosed 事件的音频提取状态记为 pending，由调用方入库后交给后台线程池提取。
+    """
+    try:
+        event_data = payload.EventData or {}
+
+        _event_id = _parse_uuid(payload.EventId)
+        if _event_id is None:
+            logger.warning("Invalid EventId format, cannot parse to UUID: %s", payload.EventId)
+            _event_id = uuid7()
 
         _session_id = None
         if event_data.get("SessionId"):
-            try:
-                _session_id = uuid.UUID(str(event_data.get("SessionId")))
-            except (ValueError, TypeError):
-                logger.warning(f"Invalid SessionId format, cannot parse to UUID: {event_data.get('SessionId')}")
-
-        def _to_str(v):
-            return str(v) if v is not None else None
-
-        event_create = WebhookEventCreate(
-            event_id=_event_id,
-            event_type=payload.EventType.value,
-            event_timestamp=payload.EventTimestamp,
-            room_id=_to_str(event_data.get("RoomId")),
-            short_id=_to_str(event_data.get("ShortId")),
-            streamer_name=event_data.get("Name"),
-            room_title=event_data.get("Title"),
-            area_parent=event_data.get("AreaNameParent"),
-            area_child=event_data.get("AreaNameChild"),
-            recording=_to_str(event_data.get("Recording")),
-            streaming=_to_str(event_data.get("Streaming")),
-            danmaku_connected=_to_str(event_data.get("DanmakuConnected")),
-            session_id=_session_id,
-            relative_path=event_data.get("RelativePath"),
-            file_size=_to_str(event_data.get("FileSize")),
-            duration=_to_str(event_data.get("Duration")),
-            file_open_time=event_data.get("FileOpenTime"),
-            file_close_time=event_data.get("FileCloseTime"),
-            raw_event_data=event_data,
-            serverchan_sent=("success" if serverchan_response and serverchan_response.get("code") == 0 else "failure"),
-            serverchan_response=serverchan_response,
-            serverchan_title=message_details.get("serverchan_title"),
-            serverchan_description=message_details.get("desp"),
-            audio_extraction_status=("pending" if payload.EventType == BililiveEventType.FILE_CLOSED else None),
-        )
-        create_webhook_event(db, event_create)
-        logger.info(f"Webhook event saved. EventId={_event_id}")
-
-        # 如果是文件关闭事件，则尝试提取音频
-        if payload.EventType == BililiveEventType.FILE_CLOSED and event_data.get("RelativePath"):
-            video_path = os.path.join(VIDEO_DIRECTORY, event_data["RelativePath"])
-            logger.info(f"FileClosed event: Starting audio extraction for {video_path}")
-            extracted_audio_path = ffmpeg_service.extract_aac_audio(video_path)
-
-            update_data = WebhookEventUpdate()
-            if extracted_audio_path:
-                logger.info(f"Audio extraction successful for {video_path}. Output: {extracted_audio_path}")
-                update_data.audio_extraction_status = "success"
-                update_data.extracted_audio_path = extracted_audio_path
-            else:
-                logger.error(f"Audio extraction failed for {video_path}")
-                update_data.audio_extraction_status = "failure"
-            
-            update_webhook_event(db, _event_id, update_data)
+            _session_id = _parse_session_uuid(event_data.get("SessionId"))
+            if _session_id is None:
+                logger.warning("Invalid SessionId format, cannot parse to UUID: %s", event_data.get('SessionId'))
+
+        return {
+            "event_id": _event_id,
+            "session_id": _session_id,
+            "audio_extraction_status": "pending" if payload.EventType == BililiveEventType.FILE_CLOSED else None,
+            "extracted_audio_path": None,
+        }
+    except Exception as e:
+        logger.exception("Failed to persist webhook event EventId=%s: %s", payload.EventId, e)
+        return None
+
+
+def _save_webhook_event(
+        db: Session,
+        payload: WebhookPayload,
+        prepared_event: Optional[Dict[str, Any]],
+        serverchan_response: Optional[dict],
+        message_details: dict,
+) -> Optional[bool]:
+    """写入事件记录：插入新记录返回 True，记录已存在返回 False，写入失败返回 None。"""
+    if prepared_event is None:
+        return None
+
+    try:
+        event_data = payload.EventData or {}
+        event_fields = {
+            "event_type": payload.EventType.value,
+            "event_timestamp": payload.EventTimestamp.isoformat() if payload.EventTimestamp else None,
+            **prepared_event,
+            **_extract_event_columns(event_data),
+            "raw_event_data": event_data,
+            "serverchan_sent": _serverchan_sent_status(serverchan_response),
+            "serverchan_response": serverchan_response,
+            "serverchan_title": message_details.get("serverchan_title"),
+            "serverchan_description": message_details.get("desp"),
+        }
+        event_create = _WEBHOOK_EVENT_CREATE_ADAPTER.validate_python(event_fields)
+        # 录播姬重试推送时 EventId 不变，已记录过的事件由数据库的冲突忽略去重，不再重复写库和提取音频
+        if create_webhook_event_if_absent(db, event_create):
+            logger.info("Webhook event saved. EventId=%s", prepared_event['event_id'])
+            return True
+        logger.info("Webhook event already recorded, skipping. EventId=%s", prepared_event['event_id'])
+        return False
 
     except Exception as e:
-        logger.exception(f"Failed to persist webhook event EventId={payload.EventId}: {e}")
\ No newline at end of file
+        logger.exception("Failed to persist webhook event EventId=%s: %s", payload.EventId, e)
+        return None
@@ -4,6 +4,7 @@ from decimal import Decimal
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from crud.asset_crud import get_position_snapshots_on_or_before
 from database import Base
 from models.account_snapshot import SecurityDailyPrice
 from models.settlement import SettlementRecord
@@ -723,3 +724,30 @@ def test_asset_service_uses_cache_for_cash_flows():
 
     assert first == second
     assert second.count == 1
+
+
+def test_position_snapshots_take_latest_record_per_code_on_or_before_target():
+    db = _create_db()
+    db.add_all(
+        [
+            _record(occur_date=date(2025, 8, 5), occur_time="10:00:00", security_code="600001",
+                    trade_type="证券买入", volume=100, amount="-1000", share_balance=100),
+            _record(occur_date=date(2025, 8, 6), occur_time="10:00:00", security_code="600001",
+                    trade_type="证券卖出", volume=100, amount="1100", share_balance=0),
+            _record(occur_date=date(2025, 8, 6), occur_time="09:30:00", security_code="000001",
+                    trade_type="证券买入", volume=100, amount="-1000", share_balance=100),
+            _record(occur_date=date(2025, 8, 6), occur_time="11:00:00", security_code="000001",
+                    trade_type="证券买入", volume=100, amount="-1000", share_balance=200),
+            _record(occur_date=date(2025, 8, 7), occur_time="10:00:00", security_code="000001",
+                    trade_type="证券卖出", volume=200, amount="2200", share_balance=0),
+        ]
+    )
+    db.commit()
+
+    try:
+        snapshots = get_position_snapshots_on_or_before(db, date(2025, 8, 6))
+    finally:
+        db.close()
+
+    # 600001 已清仓；000001 取目标日期内最后一条记录，忽略之后的卖出
+    assert [(record.security_code, record.share_balance) for record in snapshots] == [("000001", 200)]
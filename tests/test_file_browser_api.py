@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+from fastapi import HTTPException, Request
+
+from api.routers import file_browser_api
+
+
+def _prepare_video_directory(tmp_path, monkeypatch):
+    (tmp_path / "2025").mkdir()
+    (tmp_path / "2025" / "live.flv").write_bytes(b"x" * 10)
+    (tmp_path / "root.aac").write_bytes(b"y" * 3)
+    monkeypatch.setattr(file_browser_api, "VIDEO_DIRECTORY", str(tmp_path))
+
+
+def _build_request(headers: dict[str, str] | None = None) -> Request:
+    raw_headers = [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/files/", "headers": raw_headers})
+
+
+def _list_files(path=None, headers=None):
+    response = asyncio.run(file_browser_api.list_files(_build_request(headers), path=path))
+    if response.status_code != 200:
+        return response, response
+    return json.loads(response.body), response
+
+
+def test_list_files_returns_entries_relative_to_video_directory(tmp_path, monkeypatch):
+    _prepare_video_directory(tmp_path, monkeypatch)
+
+    result, _ = _list_files(path="2025")
+
+    assert len(result) == 1
+    assert result[0]["name"] == "live.flv"
+    assert result[0]["path"] == "2025/live.flv"
+    assert result[0]["is_directory"] is False
+    assert result[0]["size"] == 10
+
+
+def test_list_files_marks_directories(tmp_path, monkeypatch):
+    _prepare_video_directory(tmp_path, monkeypatch)
+
+    result, _ = _list_files()
+
+    entries = {item["name"]: item for item in result}
+    assert entries["2025"]["is_directory"] is True
+    assert entries["2025"]["path"] == "2025"
+    assert entries["root.aac"]["size"] == 3
+
+
+def test_list_files_returns_404_for_missing_directory(tmp_path, monkeypatch):
+    _prepare_video_directory(tmp_path, monkeypatch)
+
+    try:
+        _list_files(path="missing")
+    except HTTPException as exc:
+        assert exc.status_code == 404
+    else:
+        raise AssertionError("Expected HTTPException")
+
+
+def test_list_files_rejects_path_outside_video_directory(tmp_path, monkeypatch):
+    _prepare_video_directory(tmp_path, monkeypatch)
+
+    try:
+        _list_files(path="../")
+    except HTTPException as exc:
+        assert exc.status_code == 403
+    else:
+        raise AssertionError("Expected HTTPException")
+
+
+def test_list_files_returns_304_when_etag_matches(tmp_path, monkeypatch):
+    _prepare_video_directory(tmp_path, monkeypatch)
+
+    _, first_response = _list_files(path="2025")
+    etag = first_response.headers["etag"]
+    cached, _ = _list_files(path="2025", headers={"If-None-Match": etag})
+
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+
+def test_list_files_returns_304_for_wildcard_if_none_match(tmp_path, monkeypatch):
+    _prepare_video_directory(tmp_path, monkeypatch)
+
+    cached, _ = _list_files(path="2025", headers={"If-None-Match": "*"})
+
+    assert cached.status_code == 304
+
+
+def test_list_files_etag_changes_when_file_grows(tmp_path, monkeypatch):
+    _prepare_video_directory(tmp_path, monkeypatch)
+
+    _, first_response = _list_files(path="2025")
+    (tmp_path / "2025" / "live.flv").write_bytes(b"x" * 20)
+    result, second_response = _list_files(path="2025", headers={"If-None-Match": first_response.headers["etag"]})
+
+    assert result[0]["size"] == 20
+    assert second_response.headers["etag"] != first_response.headers["etag"]
+
+
+def test_stream_files_yields_ndjson_records(tmp_path, monkeypatch):
+    _prepare_video_directory(tmp_path, monkeypatch)
+
+    async def _collect():
+        response = await file_browser_api.stream_files(path="2025")
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    body = asyncio.run(_collect())
+
+    lines = body.splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["name"] == "live.flv"
+    assert record["path"] == "2025/live.flv"
+    assert record["is_directory"] is False
+    assert record["size"] == 10
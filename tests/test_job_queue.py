@@ -0,0 +1,47 @@
+import asyncio
+
+from services.job_queue import BackgroundJobQueue
+
+
+def test_job_queue_limits_concurrent_jobs():
+    queue = BackgroundJobQueue(max_workers=2)
+    state = {"running": 0, "peak": 0, "done": 0}
+
+    async def job():
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.01)
+        state["running"] -= 1
+        state["done"] += 1
+
+    async def scenario():
+        for _ in range(5):
+            queue.enqueue(job)
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+    assert state["done"] == 5
+    assert state["peak"] == 2
+
+
+def test_job_queue_keeps_running_after_failed_job():
+    queue = BackgroundJobQueue(max_workers=1)
+    completed = []
+
+    async def failing_job():
+        raise RuntimeError("boom")
+
+    async def ok_job(value):
+        completed.append(value)
+
+    async def scenario():
+        queue.enqueue(failing_job)
+        queue.enqueue(ok_job, "after-failure")
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+    assert completed == ["after-failure"]
@@ -0,0 +1,50 @@
+import asyncio
+
+import requests
+
+from services import serverchan
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"status {self.status_code}")
+
+    def json(self):
+        return self.payload
+
+
+def test_build_send_url_supports_both_key_formats():
+    assert serverchan._build_send_url("SCT123") == "https://sctapi.ftqq.com/SCT123.send"
+    assert serverchan._build_send_url("sctp42tabc") == "https://42.push.ft07.com/send/sctp42tabc.send"
+
+
+def test_send_message_posts_through_shared_session(monkeypatch):
+    calls = []
+    monkeypatch.setattr(serverchan, "get_serverchan_send_key", lambda: "SCT123")
+    monkeypatch.setattr(
+        serverchan._session,
+        "post",
+        lambda url, **kwargs: calls.append((url, kwargs)) or FakeResponse({"code": 0}),
+    )
+
+    result = asyncio.run(serverchan.send_serverchan_message_async("标题", "内容", "摘要", "a|b"))
+
+    assert result == {"code": 0}
+    url, kwargs = calls[0]
+    assert url == "https://sctapi.ftqq.com/SCT123.send"
+    assert kwargs["json"] == {"title": "标题", "desp": "内容", "tags": "a|b", "short": "摘要"}
+    assert kwargs["timeout"] == serverchan.SERVERCHAN_TIMEOUT_SECONDS
+
+
+def test_send_message_reports_http_errors(monkeypatch):
+    monkeypatch.setattr(serverchan, "get_serverchan_send_key", lambda: "SCT123")
+    monkeypatch.setattr(serverchan._session, "post", lambda url, **kwargs: FakeResponse({}, status_code=500))
+
+    result = serverchan.send_serverchan_message("标题", "内容", "摘要", "a")
+
+    assert result["code"] == -2
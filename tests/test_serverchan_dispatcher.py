@@ -0,0 +1,82 @@
+import threading
+
+from services import serverchan
+from services.serverchan_dispatcher import (
+    MERGED_SHORT_DESCRIPTION_MAX_LENGTH,
+    TITLE_MAX_LENGTH,
+    ServerChanDispatcher,
+)
+
+
+def test_dispatcher_merges_backlog_into_one_push(monkeypatch):
+    first_push_started = threading.Event()
+    release_first_push = threading.Event()
+    sent = []
+
+    def fake_send(title, desp, short_description, tags):
+        sent.append((title, desp, short_description, tags))
+        if len(sent) == 1:
+            first_push_started.set()
+            assert release_first_push.wait(timeout=5)
+        return {"code": 0}
+
+    monkeypatch.setattr(serverchan, "send_serverchan_message", fake_send)
+    dispatcher = ServerChanDispatcher(max_pending=10, max_workers=1)
+
+    try:
+        first = dispatcher.submit("标题0", "正文0", "简述0", "录播姬|主播A|直播开始")
+        assert first_push_started.wait(timeout=5)
+        # 第一条推送进行中时积压的消息，应在下一次推送中合并发送
+        backlog = [
+            dispatcher.submit(f"标题{index}", f"正文{index}", f"简述{index}", "录播姬|主播A|文件关闭")
+            for index in range(1, 4)
+        ]
+        release_first_push.set()
+        dispatcher.join()
+    finally:
+        dispatcher.stop(timeout=5)
+
+    assert len(sent) == 2
+    assert sent[1][0] == "3 条录播通知: 标题1"
+    assert sent[1][1] == "正文1\n\n---\n\n正文2\n\n---\n\n正文3"
+    assert sent[1][3] == "录播姬|主播A|文件关闭"
+    assert first.result(timeout=1) == {"code": 0}
+    assert all(future.result(timeout=1) == {"merged": 3, "code": 0} for future in backlog)
+
+
+def test_merged_push_failure_is_bounded_and_reported_to_every_message(monkeypatch):
+    first_push_started = threading.Event()
+    release_first_push = threading.Event()
+    sent = []
+
+    def fake_send(title, desp, short_description, tags):
+        sent.append((title, desp, short_description, tags))
+        if len(sent) == 1:
+            first_push_started.set()
+            assert release_first_push.wait(timeout=5)
+            return {"code": 0}
+        return {"code": 40001, "message": "bad request"}
+
+    monkeypatch.setattr(serverchan, "send_serverchan_message", fake_send)
+    dispatcher = ServerChanDispatcher(max_pending=20, max_workers=1)
+
+    try:
+        dispatcher.submit("标题0", "正文0", "简述0", "录播姬")
+        assert first_push_started.wait(timeout=5)
+        backlog = [
+            dispatcher.submit("很长的主播名字" * 5, f"正文{index}", "很长的简短描述" * 5, "录播姬")
+            for index in range(5)
+        ]
+        release_first_push.set()
+        dispatcher.join()
+    finally:
+        dispatcher.stop(timeout=5)
+
+    assert len(sent) == 2
+    assert len(sent[1][0]) <= TITLE_MAX_LENGTH
+    assert sent[1][0].startswith("5 条录播通知: ")
+    assert len(sent[1][2]) <= MERGED_SHORT_DESCRIPTION_MAX_LENGTH
+    assert all(
+        future.result(timeout=1) == {"merged": 5, "code": 40001, "message": "bad request"}
+        for future in backlog
+    )
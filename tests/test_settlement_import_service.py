@@ -1,3 +1,5 @@
+import hashlib
+import json
 from decimal import Decimal
 from typing import Optional
 
@@ -72,6 +74,93 @@ def test_import_csv_skips_existing_records():
     assert second.skipped_count == 1
 
 
+def test_import_csv_inserts_in_chunks(monkeypatch):
+    from crud import settlement_crud
+
+    monkeypatch.setattr(settlement_crud, "SETTLEMENT_INSERT_CHUNK_SIZE", 1)
+    service = SettlementImportService()
+    db = _create_db()
+    app_cache.clear()
+    file_bytes = _build_csv(
+        [
+            '2025-08-06,2025-08-06,09:29:53,= "000597      ",东北制药,证券买入,200,6.090,1218.000,-1223.000,4.930,0.07,0.00,0.00,200,3777.00,0105000000894747,= "0909655210    ",= "0100083586    ",深市A股,人民币,',
+            '2025-08-08,2025-08-08,09:40:48,= "000597      ",东北制药,证券卖出,600,5.750,3450.000,3443.270,4.780,0.22,1.73,0.00,0,4807.27,0104000010283073,= "0909655210    ",= "0100281425    ",深市A股,人民币,',
+        ]
+    )
+
+    try:
+        result = service.import_csv(db, file_bytes, "jgd.csv")
+        stored = db.query(SettlementRecord).order_by(SettlementRecord.occur_date).all()
+        stored_prices = [record.price for record in stored]
+        stored_raw_codes = [record.raw_row["证券代码"] for record in stored]
+    finally:
+        db.close()
+
+    assert result.inserted_count == 2
+    assert stored_prices == [Decimal("6.09"), Decimal("5.75")]
+    assert stored_raw_codes == ['= "000597      "', '= "000597      "']
+
+
+def test_import_csv_probes_existing_hashes_in_chunks(monkeypatch):
+    from crud import settlement_crud
+
+    monkeypatch.setattr(settlement_crud, "SETTLEMENT_HASH_PROBE_CHUNK_SIZE", 1)
+    service = SettlementImportService()
+    db = _create_db()
+    app_cache.clear()
+    file_bytes = _build_csv(
+        [
+            '2025-08-06,2025-08-06,09:29:53,= "000597      ",东北制药,证券买入,200,6.090,1218.000,-1223.000,4.930,0.07,0.00,0.00,200,3777.00,0105000000894747,= "0909655210    ",= "0100083586    ",深市A股,人民币,',
+            '2025-08-08,2025-08-08,09:40:48,= "000597      ",东北制药,证券卖出,600,5.750,3450.000,3443.270,4.780,0.22,1.73,0.00,0,4807.27,0104000010283073,= "0909655210    ",= "0100281425    ",深市A股,人民币,',
+        ]
+    )
+
+    try:
+        service.import_csv(db, file_bytes, "jgd.csv")
+        second = service.import_csv(db, file_bytes, "jgd.csv")
+    finally:
+        db.close()
+
+    assert second.inserted_count == 0
+    assert second.skipped_count == 2
+
+
+def test_import_csv_file_reads_from_disk(tmp_path):
+    service = SettlementImportService()
+    db = _create_db()
+    app_cache.clear()
+    csv_path = tmp_path / "jgd.csv"
+    csv_path.write_bytes(
+        _build_csv(
+            [
+                '2025-08-06,2025-08-06,09:29:53,= "000597      ",东北制药,证券买入,200,6.090,1218.000,-1223.000,4.930,0.07,0.00,0.00,200,3777.00,0105000000894747,= "0909655210    ",= "0100083586    ",深市A股,人民币,',
+            ]
+        )
+    )
+
+    try:
+        result = service.import_csv_file(db, str(csv_path), "jgd.csv")
+        stored_count = db.query(SettlementRecord).count()
+    finally:
+        db.close()
+
+    assert result.inserted_count == 1
+    assert stored_count == 1
+
+
+def test_parse_csv_file_rejects_empty_file(tmp_path):
+    service = SettlementImportService()
+    csv_path = tmp_path / "empty.csv"
+    csv_path.write_bytes(b"")
+
+    try:
+        service.parse_csv_file(str(csv_path))
+    except SettlementImportError as exc:
+        assert "CSV 文件为空" == str(exc)
+    else:
+        raise AssertionError("Expected SettlementImportError")
+
+
 def test_normalize_row_cleans_excel_style_text():
     service = SettlementImportService()
     normalized = service.normalize_row(
@@ -200,3 +289,25 @@ def test_import_csv_clears_asset_cash_flows_cache_when_new_records_inserted():
         db.close()
 
     assert app_cache.get("asset_cash_flows:2025-08-06:10") is None
+
+
+def test_source_hash_matches_stdlib_canonical_json():
+    service = SettlementImportService()
+    raw_row = service.parse_csv(
+        _build_csv(
+            [
+                '2025-08-06,2025-08-06,09:29:53,= "000597      ",东北制药,证券买入,200,6.090,1218.000,-1223.000,4.930,0.07,0.00,0.00,200,3777.00,0105000000894747,= "0909655210    ",= "0100083586    ",深市A股,人民币,',
+            ]
+        )
+    )[0]
+    normalized = service.normalize_row(raw_row, row_number=2)
+    payload = {
+        key: value.isoformat() if hasattr(value, "isoformat") else value
+        for key, value in normalized.items()
+        if key not in {"source_hash", "raw_row"}
+    }
+    payload["price"] = "6.09"
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+    # 已入库记录的哈希由标准库 json 生成，序列化方式变化后必须保持一致
+    assert normalized["source_hash"] == hashlib.sha256(canonical.encode("utf-8")).hexdigest()
@@ -1,4 +1,5 @@
 import asyncio
+import json
 import os
 import sys
 import uuid
@@ -11,14 +12,20 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from api.routers import task_api
 from database import Base
 from models.task import TranscriptionTask, TaskStatus
+from schemas.task import MultiFileTaskCreate
 
 
-def test_batch_results_sorted_by_original_audio_path():
+def _create_session_factory():
     engine = create_engine(
         "sqlite:///:memory:", connect_args={"check_same_thread": False}
     )
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     Base.metadata.create_all(bind=engine)
+    return testing_session_local
+
+
+def test_batch_results_sorted_by_original_audio_path():
+    TestingSessionLocal = _create_session_factory()
 
     batch_id = uuid.uuid4()
 
@@ -53,3 +60,200 @@ def test_batch_results_sorted_by_original_audio_path():
     assert result.results == ["result for a", "result for b"]
     assert result.completed_count == 2
     assert result.total_count == 2
+
+
+def test_multi_file_task_creation_inserts_tasks_in_request_order(tmp_path, monkeypatch):
+    TestingSessionLocal = _create_session_factory()
+
+    audio_paths = []
+    for name in ("b.aac", "a.mp3"):
+        audio_file = tmp_path / name
+        audio_file.write_bytes(b"audio")
+        audio_paths.append(str(audio_file))
+
+    db = TestingSessionLocal()
+    enqueued_jobs = []
+    monkeypatch.setattr(
+        task_api.transcription_job_queue,
+        "enqueue",
+        lambda func, *args, **kwargs: enqueued_jobs.append((func, args)),
+    )
+
+    try:
+        created = asyncio.run(
+            task_api.create_multi_file_transcription_task(
+                payload=MultiFileTaskCreate(file_paths=[*audio_paths, str(tmp_path / "missing.wav")]),
+                db=db,
+            )
+        )
+        stored_count = db.query(TranscriptionTask).count()
+    finally:
+        db.close()
+
+    assert [task.original_audio_path for task in created] == audio_paths
+    assert len({task.batch_id for task in created}) == 1
+    assert all(task.created_at is not None for task in created)
+    assert stored_count == 2
+    assert [func for func, _ in enqueued_jobs] == [task_api.transcription_service.run_transcription_pipeline] * 2
+    assert [args[0] for _, args in enqueued_jobs] == [task.id for task in created]
+
+
+def test_multi_file_task_creation_extracts_videos_concurrently(tmp_path, monkeypatch):
+    TestingSessionLocal = _create_session_factory()
+
+    video_paths = []
+    for name in ("slow.flv", "broken.flv", "fast.mp4"):
+        video_file = tmp_path / name
+        video_file.write_bytes(b"video")
+        video_paths.append(str(video_file))
+
+    started = []
+
+    def fake_extract(source_path):
+        started.append(source_path)
+        if source_path.endswith("broken.flv"):
+            return None
+        return source_path.rsplit(".", 1)[0] + ".aac"
+
+    monkeypatch.setattr(task_api.ffmpeg_service, "extract_aac_audio", fake_extract)
+    monkeypatch.setattr(task_api.transcription_job_queue, "enqueue", lambda func, *args, **kwargs: None)
+
+    db = TestingSessionLocal()
+    try:
+        created = asyncio.run(
+            task_api.create_multi_file_transcription_task(
+                payload=MultiFileTaskCreate(file_paths=video_paths),
+                db=db,
+            )
+        )
+    finally:
+        db.close()
+
+    assert sorted(started) == sorted(video_paths)
+    assert [task.original_audio_path for task in created] == [
+        str(tmp_path / "slow.aac"),
+        str(tmp_path / "fast.aac"),
+    ]
+
+
+def test_batch_results_reports_progress_while_tasks_pending():
+    TestingSessionLocal = _create_session_factory()
+
+    batch_id = uuid.uuid4()
+    db = TestingSessionLocal()
+    db.add_all([
+        TranscriptionTask(
+            id=uuid.uuid4(),
+            batch_id=batch_id,
+            original_audio_path="/audio/a.wav",
+            status=TaskStatus.COMPLETED,
+            transcription_result="result for a",
+        ),
+        TranscriptionTask(
+            id=uuid.uuid4(),
+            batch_id=batch_id,
+            original_audio_path="/audio/b.wav",
+            status=TaskStatus.PROCESSING,
+        ),
+    ])
+    db.commit()
+
+    try:
+        result = asyncio.run(
+            task_api.get_batch_transcription_results(batch_id=batch_id, db=db)
+        )
+    finally:
+        db.close()
+
+    assert result.status == TaskStatus.PROCESSING
+    assert result.results is None
+    assert result.completed_count == 1
+    assert result.total_count == 2
+
+
+def test_recent_tasks_serialized_as_task_list_json():
+    TestingSessionLocal = _create_session_factory()
+
+    db = TestingSessionLocal()
+    task = TranscriptionTask(
+        id=uuid.uuid4(),
+        original_audio_path="/audio/a.wav",
+        status=TaskStatus.PENDING,
+    )
+    db.add(task)
+    db.commit()
+
+    try:
+        response = asyncio.run(task_api.get_recent_tasks(limit=10, db=db))
+    finally:
+        db.close()
+
+    payload = json.loads(response.body)
+    assert response.media_type == "application/json"
+    assert len(payload) == 1
+    assert payload[0]["id"] == str(task.id)
+    assert payload[0]["status"] == TaskStatus.PENDING.value
+    assert payload[0]["created_at"] is not None
+
+
+def test_create_task_fills_server_defaults_without_extra_select():
+    from sqlalchemy import event
+
+    from crud.task_crud import create_task
+    from schemas.task import TaskCreate
+
+    TestingSessionLocal = _create_session_factory()
+    statements = []
+
+    db = TestingSessionLocal()
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    try:
+        task = create_task(db, TaskCreate(local_audio_path="/audio/a.wav"))
+        created_at = task.created_at
+    finally:
+        db.close()
+
+    assert created_at is not None
+    assert not any(statement.lstrip().upper().startswith("SELECT") for statement in statements)
+
+
+def test_update_task_commits_without_refresh_select():
+    from sqlalchemy import event
+
+    from crud.task_crud import create_task, update_task
+    from schemas.task import TaskCreate
+
+    TestingSessionLocal = _create_session_factory()
+    statements = []
+
+    db = TestingSessionLocal()
+    try:
+        task = create_task(db, TaskCreate(local_audio_path="/audio/a.wav"))
+        event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+        updated = update_task(db, task.id, {"status": TaskStatus.UPLOADING})
+        update_statements = list(statements)
+        status = updated.status
+    finally:
+        db.close()
+
+    assert status == TaskStatus.UPLOADING
+    assert not any(statement.lstrip().upper().startswith("SELECT") for statement in update_statements)
+
+
+def test_task_ids_are_time_ordered_uuid7():
+    from crud.task_crud import bulk_create_tasks, create_task
+    from schemas.task import TaskCreate
+
+    TestingSessionLocal = _create_session_factory()
+
+    db = TestingSessionLocal()
+    try:
+        single = create_task(db, TaskCreate(local_audio_path="/audio/a.wav"))
+        batch = bulk_create_tasks(db, [TaskCreate(local_audio_path="/audio/b.wav")])
+    finally:
+        db.close()
+
+    assert single.id.version == 7
+    assert batch[0].id.version == 7
+    # 高 48 位是毫秒时间戳，后创建的任务不会排在前面
+    assert batch[0].id.int >> 80 >= single.id.int >> 80
@@ -0,0 +1,116 @@
+from qcloud_cos import CosServiceError
+
+from services import tencent_cloud_cos
+from services.simple_cache import SimpleTTLCache
+from services.tencent_cloud_cos import TencentCosService
+
+
+class FakeCosClient:
+    def __init__(self, upload_errors=None):
+        self.presign_calls = []
+        self.upload_calls = 0
+        self.upload_errors = list(upload_errors or [])
+
+    def upload_file(self, **kwargs):
+        self.upload_calls += 1
+        if self.upload_errors:
+            raise self.upload_errors.pop(0)
+        return {"ETag": "etag"}
+
+    def get_presigned_url(self, **kwargs):
+        self.presign_calls.append(kwargs)
+        return f"https://cos.example.com/{kwargs['Key']}?sign={len(self.presign_calls)}"
+
+
+def _build_service(monkeypatch, clock=None) -> TencentCosService:
+    # 每个用例使用新的单例，测试结束后恢复，避免假客户端泄漏到同进程的其他测试
+    monkeypatch.setattr(TencentCosService, "_instance", None)
+    service = TencentCosService()
+    service.client = FakeCosClient()
+    service.bucket = "bucket-1250000000"
+    service.cache = SimpleTTLCache(clock=clock)
+    return service
+
+
+def test_presigned_url_is_cached_per_key_and_expiration(monkeypatch):
+    service = _build_service(monkeypatch)
+
+    first = service.get_presigned_download_url("a.aac", expiration_seconds=3600)
+    second = service.get_presigned_download_url("a.aac", expiration_seconds=3600)
+    other_expiration = service.get_presigned_download_url("a.aac", expiration_seconds=600)
+
+    assert first == second
+    assert other_expiration != first
+    assert len(service.client.presign_calls) == 2
+
+
+def test_presigned_url_cache_expires_before_url(monkeypatch):
+    clock_value = {"now": 0.0}
+    service = _build_service(monkeypatch, clock=lambda: clock_value["now"])
+
+    first = service.get_presigned_download_url("a.aac", expiration_seconds=3600)
+    clock_value["now"] = 1800.0
+    second = service.get_presigned_download_url("a.aac", expiration_seconds=3600)
+
+    assert first != second
+    assert len(service.client.presign_calls) == 2
+
+
+def test_service_is_initialized_only_once(monkeypatch):
+    monkeypatch.setattr(TencentCosService, "_instance", None)
+    monkeypatch.setattr(
+        tencent_cloud_cos,
+        "get_tencentcloud_cos_credentials",
+        lambda: ("id", "key", "bucket-1250000000", "ap-guangzhou"),
+    )
+    service = TencentCosService()
+    client = service.client
+
+    # 单例再次构造时不应重建客户端、覆盖已有状态
+    assert client is not None
+    assert TencentCosService() is service
+    assert service.client is client
+
+
+def test_failed_initialization_is_retried(monkeypatch):
+    monkeypatch.setattr(TencentCosService, "_instance", None)
+    monkeypatch.setattr(tencent_cloud_cos, "get_tencentcloud_cos_credentials", lambda: (None, None, None, None))
+    service = TencentCosService()
+    assert service.client is None
+
+    monkeypatch.setattr(
+        tencent_cloud_cos,
+        "get_tencentcloud_cos_credentials",
+        lambda: ("id", "key", "bucket-1250000000", "ap-guangzhou"),
+    )
+
+    assert TencentCosService() is service
+    assert service.client is not None
+    assert service.bucket == "bucket-1250000000"
+
+
+def test_upload_retries_server_errors_with_backoff(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(tencent_cloud_cos.time, "sleep", sleeps.append)
+    local_file = tmp_path / "a.aac"
+    local_file.write_bytes(b"audio")
+    service = _build_service(monkeypatch)
+    service.client = FakeCosClient(upload_errors=[CosServiceError("PUT", "busy", 503)])
+
+    assert service.upload_file(str(local_file), key="a.aac") is True
+    assert service.client.upload_calls == 2
+    assert len(sleeps) == 1
+    assert 0.4 <= sleeps[0] <= 0.6
+
+
+def test_upload_does_not_retry_client_errors(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(tencent_cloud_cos.time, "sleep", sleeps.append)
+    local_file = tmp_path / "a.aac"
+    local_file.write_bytes(b"audio")
+    service = _build_service(monkeypatch)
+    service.client = FakeCosClient(upload_errors=[CosServiceError("PUT", "denied", 403)])
+
+    assert service.upload_file(str(local_file), key="a.aac") is False
+    assert service.client.upload_calls == 1
+    assert sleeps == []
@@ -0,0 +1,56 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi.exceptions import RequestValidationError
+from starlette.requests import Request
+
+from api.routers import webhook
+
+
+def _build_request(body: bytes) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/webhook",
+        "headers": [(b"content-type", b"application/json")],
+    }
+    return Request(scope, receive)
+
+
+def test_receive_webhook_handles_payload_off_the_event_loop_thread(monkeypatch):
+    calls = []
+
+    def fake_handle_webhook(payload, db):
+        calls.append((payload.EventId, payload.EventData, db, threading.get_ident()))
+        return {"serverchan_status": "success"}
+
+    monkeypatch.setattr(webhook.webhook_service, "handle_webhook", fake_handle_webhook)
+    body = json.dumps({
+        "EventType": "StreamStarted",
+        "EventId": "c5a7ac4b-6b8e-4c5b-8e3d-2d9c1f0e7a11",
+        "EventData": {"Name": "主播"},
+    }).encode()
+    db = object()
+
+    async def _receive():
+        return await webhook.receive_webhook(_build_request(body), db=db), threading.get_ident()
+
+    result, loop_thread_id = asyncio.run(_receive())
+
+    assert json.loads(result.body) == {"serverchan_status": "success"}
+    assert calls[0][:3] == ("c5a7ac4b-6b8e-4c5b-8e3d-2d9c1f0e7a11", {"Name": "主播"}, db)
+    assert calls[0][3] != loop_thread_id
+
+
+def test_receive_webhook_rejects_invalid_body_as_validation_error():
+    body = json.dumps({"EventType": "Unknown", "EventId": "x", "EventData": {}}).encode()
+
+    with pytest.raises(RequestValidationError) as exc_info:
+        asyncio.run(webhook.receive_webhook(_build_request(body), db=object()))
+
+    assert exc_info.value.errors()[0]["loc"] == ("body", "EventType")
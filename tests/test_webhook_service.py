@@ -0,0 +1,331 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+from models.webhook import BililiveEventType, WebhookPayload
+from models.webhook_event import WebhookEvent
+from services import serverchan, webhook_service
+from services.serverchan_dispatcher import serverchan_dispatcher
+
+
+def _create_session_factory():
+    # 推送结果在 worker 线程中回写，StaticPool 让各线程共享同一个内存库
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local
+
+
+def _create_db():
+    return _create_session_factory()()
+
+
+def _file_closed_payload(event_id: str) -> WebhookPayload:
+    return WebhookPayload(
+        EventType=BililiveEventType.FILE_CLOSED,
+        EventId=event_id,
+        EventData={"Name": "主播", "RoomId": 1, "RelativePath": "2025/live.flv"},
+    )
+
+
+def test_file_closed_event_is_saved_pending_without_running_ffmpeg_inline(monkeypatch):
+    extracted = []
+    monkeypatch.setattr(webhook_service.ffmpeg_service, "extract_aac_audio", lambda path: extracted.append(path))
+    db = _create_db()
+    payload = _file_closed_payload(str(uuid.uuid4()))
+
+    try:
+        prepared_event = webhook_service._prepare_webhook_event(payload)
+        saved = webhook_service._save_webhook_event(db, payload, prepared_event, {"code": 0}, {})
+        events = db.query(WebhookEvent).all()
+    finally:
+        db.close()
+
+    assert saved is True
+    assert extracted == []
+    assert len(events) == 1
+    assert events[0].audio_extraction_status == "pending"
+    assert events[0].extracted_audio_path is None
+    assert events[0].serverchan_sent == "success"
+    assert events[0].room_id == "1"
+    assert events[0].streamer_name == "主播"
+    assert events[0].relative_path == "2025/live.flv"
+
+
+def test_save_reports_already_recorded_event():
+    db = _create_db()
+    payload = _file_closed_payload(str(uuid.uuid4()))
+
+    try:
+        prepared_event = webhook_service._prepare_webhook_event(payload)
+        first = webhook_service._save_webhook_event(db, payload, prepared_event, {"code": 0}, {})
+        second = webhook_service._save_webhook_event(db, payload, prepared_event, {"code": 0}, {})
+        events = db.query(WebhookEvent).all()
+    finally:
+        db.close()
+
+    assert first is True
+    assert second is False
+    assert len(events) == 1
+
+
+def test_handle_webhook_does_not_push_event_already_in_database(monkeypatch):
+    sent = []
+    monkeypatch.setattr(serverchan, "send_serverchan_message", lambda *args: sent.append(args) or {"code": 0})
+    monkeypatch.setattr(serverchan, "get_serverchan_send_key", lambda: "SCT123")
+    session_factory = _create_session_factory()
+    monkeypatch.setattr(webhook_service, "SessionLocal", session_factory)
+    db = session_factory()
+    payload = WebhookPayload(
+        EventType=BililiveEventType.STREAM_STARTED,
+        EventId=str(uuid.uuid4()),
+        EventData={"Name": "主播", "RoomId": 1},
+    )
+
+    try:
+        first = webhook_service.handle_webhook(payload, db)
+        serverchan_dispatcher.join()
+        # 模拟进程重启：内存中的去重记录已丢失，只剩数据库中的记录
+        webhook_service._forget_event_id(payload.EventId)
+        second = webhook_service.handle_webhook(payload, db)
+        serverchan_dispatcher.join()
+    finally:
+        db.close()
+
+    assert first["serverchan_status"] == "queued"
+    assert second["serverchan_status"] == "duplicate"
+    assert len(sent) == 1
+
+
+def test_resume_pending_audio_extractions_records_results(monkeypatch):
+    monkeypatch.setattr(webhook_service.ffmpeg_service, "extract_aac_audio", lambda path: None)
+    extraction_executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(webhook_service, "_AUDIO_EXTRACTION_EXECUTOR", extraction_executor)
+    session_factory = _create_session_factory()
+    monkeypatch.setattr(webhook_service, "SessionLocal", session_factory)
+    payload = _file_closed_payload(str(uuid.uuid4()))
+
+    with session_factory() as db:
+        prepared_event = webhook_service._prepare_webhook_event(payload)
+        webhook_service._save_webhook_event(db, payload, prepared_event, {"code": 0}, {})
+
+    resumed = webhook_service.resume_pending_audio_extractions()
+    extraction_executor.shutdown(wait=True)
+
+    with session_factory() as check_db:
+        event = check_db.query(WebhookEvent).one()
+
+    assert resumed == 1
+    assert event.audio_extraction_status == "failure"
+
+
+def test_audio_extraction_can_restart_after_stop(monkeypatch):
+    monkeypatch.setattr(webhook_service.ffmpeg_service, "extract_aac_audio", lambda path: None)
+    monkeypatch.setattr(webhook_service, "_AUDIO_EXTRACTION_EXECUTOR", ThreadPoolExecutor(max_workers=1))
+    session_factory = _create_session_factory()
+    monkeypatch.setattr(webhook_service, "SessionLocal", session_factory)
+    payload = _file_closed_payload(str(uuid.uuid4()))
+
+    # 第一次应用生命周期结束后，同一进程内再次启动仍然可以提交提取任务
+    webhook_service.stop_audio_extraction()
+    with session_factory() as db:
+        prepared_event = webhook_service._prepare_webhook_event(payload)
+        saved = webhook_service._save_webhook_event(db, payload, prepared_event, {"code": 0}, {})
+    webhook_service._schedule_audio_extraction(payload, prepared_event, saved)
+    webhook_service.stop_audio_extraction()
+
+    with session_factory() as check_db:
+        event = check_db.query(WebhookEvent).one()
+
+    assert webhook_service._AUDIO_EXTRACTION_EXECUTOR is None
+    assert event.audio_extraction_status == "failure"
+
+
+def test_parse_uuid_accepts_canonical_and_hex_forms_only():
+    value = uuid.uuid4()
+
+    assert webhook_service._parse_uuid(str(value)) == value
+    assert webhook_service._parse_uuid(value.hex.upper()) == value
+    assert webhook_service._parse_uuid("not-a-uuid") is None
+    assert webhook_service._parse_uuid(None) is None
+    assert webhook_service._parse_uuid(str(value) + "\n") is None
+    assert webhook_service._parse_session_uuid(str(value)) == value
+    assert webhook_service._parse_session_uuid(str(value) + "\n") is None
+
+
+def test_prepare_falls_back_for_ids_with_trailing_newline():
+    db = _create_db()
+    event_id = str(uuid.uuid4()) + "\n"
+    payload = WebhookPayload(
+        EventType=BililiveEventType.STREAM_STARTED,
+        EventId=event_id,
+        EventData={"Name": "主播", "RoomId": 1, "SessionId": str(uuid.uuid4()) + "\n"},
+    )
+
+    try:
+        prepared_event = webhook_service._prepare_webhook_event(payload)
+        webhook_service._save_webhook_event(db, payload, prepared_event, {"code": 0}, {})
+        events = db.query(WebhookEvent).all()
+    finally:
+        db.close()
+
+    assert len(events) == 1
+    assert str(events[0].event_id) != event_id.strip()
+    assert events[0].session_id is None
+
+
+def test_handle_webhook_returns_before_push_and_records_result_later(monkeypatch):
+    release_push = threading.Event()
+
+    def fake_send(title, desp, short_description, tags):
+        assert release_push.wait(timeout=5)
+        return {"code": 0}
+
+    release_extraction = threading.Event()
+
+    def fake_extract(path):
+        assert release_extraction.wait(timeout=5)
+        return "/videos/2025/live.aac"
+
+    monkeypatch.setattr(serverchan, "send_serverchan_message", fake_send)
+    monkeypatch.setattr(serverchan, "get_serverchan_send_key", lambda: "SCT123")
+    monkeypatch.setattr(webhook_service.ffmpeg_service, "extract_aac_audio", fake_extract)
+    extraction_executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(webhook_service, "_AUDIO_EXTRACTION_EXECUTOR", extraction_executor)
+    session_factory = _create_session_factory()
+    monkeypatch.setattr(webhook_service, "SessionLocal", session_factory)
+    db = session_factory()
+
+    try:
+        result = webhook_service.handle_webhook(_file_closed_payload(str(uuid.uuid4())), db)
+        pending_event = db.query(WebhookEvent).one()
+        pending_status = pending_event.serverchan_sent
+        pending_extraction_status = pending_event.audio_extraction_status
+        release_push.set()
+        release_extraction.set()
+        serverchan_dispatcher.join()
+        extraction_executor.shutdown(wait=True)
+    finally:
+        db.close()
+
+    with session_factory() as check_db:
+        event = check_db.query(WebhookEvent).one()
+
+    assert result["serverchan_status"] == "queued"
+    assert pending_status == "pending"
+    assert pending_extraction_status == "pending"
+    assert event.serverchan_sent == "success"
+    assert event.serverchan_response == {"code": 0}
+    assert event.audio_extraction_status == "success"
+    assert event.extracted_audio_path == "/videos/2025/live.aac"
+
+
+def test_handle_webhook_skips_recently_seen_event_id(monkeypatch):
+    sent = []
+    monkeypatch.setattr(serverchan, "send_serverchan_message", lambda *args: sent.append(args) or {"code": 0})
+    monkeypatch.setattr(serverchan, "get_serverchan_send_key", lambda: "SCT123")
+    session_factory = _create_session_factory()
+    monkeypatch.setattr(webhook_service, "SessionLocal", session_factory)
+    db = session_factory()
+    payload = WebhookPayload(
+        EventType=BililiveEventType.STREAM_STARTED,
+        EventId=str(uuid.uuid4()),
+        EventData={"Name": "主播", "RoomId": 1},
+    )
+
+    try:
+        first = webhook_service.handle_webhook(payload, db)
+        second = webhook_service.handle_webhook(payload, db)
+        serverchan_dispatcher.join()
+    finally:
+        db.close()
+
+    assert first["serverchan_status"] == "queued"
+    assert second["serverchan_status"] == "duplicate"
+    assert len(sent) == 1
+
+
+def test_handle_webhook_records_failure_without_building_message_when_not_configured(monkeypatch):
+    def fail_generate(payload):
+        raise AssertionError("message should not be generated")
+
+    monkeypatch.setattr(serverchan, "get_serverchan_send_key", lambda: None)
+    monkeypatch.setattr(webhook_service, "_generate_serverchan_message", fail_generate)
+    db = _create_db()
+    payload = WebhookPayload(
+        EventType=BililiveEventType.STREAM_STARTED,
+        EventId=str(uuid.uuid4()),
+        EventData={"Name": "主播", "RoomId": 1},
+    )
+
+    try:
+        result = webhook_service.handle_webhook(payload, db)
+        event = db.query(WebhookEvent).one()
+    finally:
+        db.close()
+
+    assert result["serverchan_status"] == "not_configured"
+    assert event.serverchan_sent == "failure"
+    assert event.serverchan_response == {"code": -1, "message": "ServerChan SEND_KEY not configured."}
+    assert event.serverchan_description is None
+
+
+def test_generate_serverchan_message_fills_file_closed_template():
+    payload = WebhookPayload(
+        EventType=BililiveEventType.FILE_CLOSED,
+        EventId="event-1",
+        EventData={"Name": "主播", "RoomId": 1, "RelativePath": "2025/live.flv", "FileSize": 2048},
+    )
+
+    message = webhook_service._generate_serverchan_message(payload)
+
+    assert message["serverchan_title"].endswith("主播 录制文件已关闭")
+    assert message["short_description"] == "录制文件 '2025/live.flv' 已保存，大小: 2.00 KB。"
+    assert message["tags"] == "录播姬|主播|文件关闭"
+    assert "## 文件关闭" in message["desp"]
+    assert "**事件时间**: `N/A`" in message["desp"]
+    assert "**相对路径**: `2025/live.flv`" in message["desp"]
+    assert "**文件关闭时间**: `N/A`" in message["desp"]
+
+
+def test_event_timestamp_is_parsed_once_and_rendered_as_iso_8601():
+    payload = WebhookPayload(
+        EventType=BililiveEventType.STREAM_STARTED,
+        EventId="event-2",
+        EventTimestamp="2021-05-14T17:52:54.9439478+08:00",
+        EventData={"Name": "主播"},
+    )
+
+    message = webhook_service._generate_serverchan_message(payload)
+
+    assert payload.EventTimestamp.utcoffset().total_seconds() == 8 * 3600
+    assert "**事件时间**: `2021-05-14T17:52:54.943947+08:00`" in message["desp"]
+
+
+def test_save_ignores_event_recorded_by_concurrent_delivery():
+    db = _create_db()
+    payload = _file_closed_payload(str(uuid.uuid4()))
+    prepared_event = {
+        "event_id": uuid.UUID(payload.EventId),
+        "session_id": None,
+        "audio_extraction_status": None,
+        "extracted_audio_path": None,
+    }
+
+    try:
+        # 同一事件的两次并发推送，第二次写库应被数据库冲突忽略而不是报错
+        webhook_service._save_webhook_event(db, payload, prepared_event, {"code": 0}, {})
+        webhook_service._save_webhook_event(db, payload, prepared_event, {"code": 1}, {})
+        events = db.query(WebhookEvent).all()
+    finally:
+        db.close()
+
+    assert len(events) == 1
+    assert events[0].serverchan_sent == "success"
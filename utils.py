@@ -1,27 +1,48 @@
 import json
-from typing import Any
+import os
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Optional
 from constants import EMOJI_CHECK, EMOJI_CROSS
 
 
+# 辅助函数：生成按时间递增的 UUIDv7（RFC 9562），作主键时插入总落在索引末尾，避免随机 UUID 造成的页分裂
+def uuid7() -> uuid.UUID:
+    timestamp_ms = time.time_ns() // 1_000_000
+    value = (timestamp_ms & ((1 << 48) - 1)) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
 # 辅助函数：格式化布尔值（使用 Emoji）
 def format_bool_emoji(value: Any) -> str:
-    if isinstance(value, bool):
-        return EMOJI_CHECK if value else EMOJI_CROSS
+    # True/False 是单例，身份比较即可，比 isinstance 加分支更省
+    if value is True:
+        return EMOJI_CHECK
+    if value is False:
+        return EMOJI_CROSS
     return str(value)
 
 
+_KB = 1024
+_MB = 1024 * _KB
+_GB = 1024 * _MB
+
+
 # 辅助函数：格式化文件大小
 def format_file_size(bytes_size: Any) -> str:
     try:
         size = float(bytes_size)
-        if size < 1024:
+        if size < _KB:
             return f"{size:.2f} B"
-        elif size < 1024 * 1024:
-            return f"{size / 1024:.2f} KB"
-        elif size < 1024 * 1024 * 1024:
-            return f"{size / (1024 * 1024):.2f} MB"
+        elif size < _MB:
+            return f"{size / _KB:.2f} KB"
+        elif size < _GB:
+            return f"{size / _MB:.2f} MB"
         else:
-            return f"{size / (1024 * 1024 * 1024):.2f} GB"
+            return f"{size / _GB:.2f} GB"
     except (ValueError, TypeError):
         return str(bytes_size)
 
@@ -33,13 +54,25 @@ def format_duration(seconds: Any) -> str:
         if duration < 60:
             return f"{duration:.2f} 秒"
         elif duration < 3600:
-            minutes = int(duration // 60)
-            seconds_rem = duration % 60
-            return f"{minutes} 分 {seconds_rem:.2f} 秒"
+            minutes, seconds_rem = divmod(duration, 60)
+            return f"{int(minutes)} 分 {seconds_rem:.2f} 秒"
         else:
-            hours = int(duration // 3600)
-            minutes_rem = int((duration % 3600) // 60)
-            seconds_rem = duration % 60
-            return f"{hours} 时 {minutes_rem} 分 {seconds_rem:.2f} 秒"
+            hours, rem = divmod(duration, 3600)
+            minutes_rem, seconds_rem = divmod(rem, 60)
+            return f"{int(hours)} 时 {int(minutes_rem)} 分 {seconds_rem:.2f} 秒"
     except (ValueError, TypeError):
         return str(seconds)
+
+
+@lru_cache(maxsize=None)
+def _normalize_root(root: str) -> str:
+    return os.path.abspath(root)
+
+
+# 辅助函数：将相对路径限制在根目录内，越界（如包含 ..）时返回 None
+def resolve_within_directory(root: str, relative_path: Optional[str]) -> Optional[str]:
+    normalized_root = _normalize_root(root)
+    resolved = os.path.normpath(os.path.join(normalized_root, relative_path or ""))
+    if os.path.commonpath([normalized_root, resolved]) != normalized_root:
+        return None
+    return resolved